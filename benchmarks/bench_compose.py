@@ -0,0 +1,85 @@
+"""Images/sec of overlay composition, current implementation vs. the original one.
+
+Usage: python -m benchmarks.bench_compose [images]
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+from io import BytesIO
+from PIL import Image, ImageDraw
+from src import image
+
+
+def compose_image_original(media_data, overlay_data, output_path):
+    """The original implementation: full RGBA conversion, full-size resize and composite"""
+    base_img = Image.open(BytesIO(media_data))
+    overlay_img = Image.open(BytesIO(overlay_data))
+    if base_img.mode != 'RGBA':
+        base_img = base_img.convert('RGBA')
+    if overlay_img.mode != 'RGBA':
+        overlay_img = overlay_img.convert('RGBA')
+    if overlay_img.size != base_img.size:
+        overlay_img = overlay_img.resize(base_img.size, Image.Resampling.LANCZOS)
+    composed = Image.alpha_composite(base_img, overlay_img)
+    if output_path.lower().endswith('.jpg'):
+        composed = composed.convert('RGB')
+    composed.save(output_path, quality=95)
+    return True
+
+
+def encode(img, fmt, **params):
+    buffer = BytesIO()
+    img.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def make_corpus(count, seed=0):
+    """Snapchat-like pairs: 1080x1920 photos with 540x960 overlays of varying coverage"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        base = Image.effect_noise((1080, 1920), 40).convert('RGB')
+        overlay = Image.new('RGBA', (540, 960), (0, 0, 0, 0))
+        kind = ('empty', 'caption', 'sticker', 'drawing')[i % 4]
+        draw = ImageDraw.Draw(overlay)
+        if kind == 'caption':
+            y = rng.randint(200, 800)
+            draw.rectangle((0, y, 540, y + 40), fill=(0, 0, 0, 150))
+        elif kind == 'sticker':
+            x, y = rng.randint(0, 400), rng.randint(0, 800)
+            draw.ellipse((x, y, x + 120, y + 120), fill=(255, 200, 0, 255))
+        elif kind == 'drawing':
+            points = [(rng.randint(0, 540), rng.randint(0, 960)) for _ in range(30)]
+            draw.line(points, fill=(255, 0, 0, 255), width=6)
+        corpus.append((encode(base, 'JPEG', quality=90), encode(overlay, 'PNG')))
+    return corpus
+
+
+def run(compose, corpus, output_path):
+    start = time.perf_counter()
+    for media_data, overlay_data in corpus:
+        compose(media_data, overlay_data, output_path)
+    elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 3), 'images_per_sec': round(len(corpus) / elapsed, 2)}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    corpus = make_corpus(count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "composed.jpg")
+        results = {
+            'images': count,
+            'original': run(compose_image_original, corpus, output_path),
+            'current': run(image.compose_image, corpus, output_path),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
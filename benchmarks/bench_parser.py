@@ -0,0 +1,76 @@
+"""Compare the streaming HTML parser against the original whole-file regex parser.
+
+Usage: python -m benchmarks.bench_parser [rows ...]
+"""
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import tracemalloc
+from src.models import Memory
+from src.parser import HTMLParser
+from benchmarks.html_generator import generate_html
+
+
+def parse_regex(html_file):
+    """The original implementation: read everything, findall, then search each row"""
+    with open(html_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    pattern = r'<tr><td>([^<]+)</td><td>([^<]+)</td><td>([^<]+)</td><td>.*?onclick="downloadMemories\(\'([^\']+)\''
+    memories = []
+    seen_urls = set()
+    for date_str, media_type, location_str, url in re.findall(pattern, content):
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        lat, lon = None, None
+        coords_match = re.search(r'Latitude, Longitude:\s*([-\d.]+),\s*([-\d.]+)', location_str)
+        if coords_match:
+            lat, lon = float(coords_match.group(1)), float(coords_match.group(2))
+        memories.append(Memory(url=url, date=date_str.strip(), type=media_type.strip(),
+                               latitude=lat, longitude=lon))
+    return memories
+
+
+def parse_streaming(html_file):
+    # Consume without keeping the memories, as a downloader fed by the generator would
+    count = 0
+    for _ in HTMLParser(html_file).iter_memories():
+        count += 1
+    return count
+
+
+def measure(func, html_file):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(html_file)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = result if isinstance(result, int) else len(result)
+    return {'seconds': round(elapsed, 3), 'peak_mb': round(peak / 1024 / 1024, 1), 'memories': count}
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            html_file = os.path.join(tmp, f"memories_{rows}.html")
+            generate_html(html_file, rows)
+            results.append({
+                'rows': rows,
+                'file_mb': round(os.path.getsize(html_file) / 1024 / 1024, 1),
+                'regex': measure(parse_regex, html_file),
+                'streaming': measure(parse_streaming, html_file),
+            })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
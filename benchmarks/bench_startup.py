@@ -0,0 +1,92 @@
+"""Startup time of the CLI and the modules each kind of run loads.
+
+Runs main.py in fresh interpreters: `--help`, and a `--dry-run` over a
+generated HTML file. Neither may load the network or imaging stacks, so
+they are listed if they show up. Results are printed as JSON; with
+--max-ms the exit status is 1 when a median exceeds it, to catch
+regressions in CI or in a scheduler's pre-flight check.
+
+Usage: python -m benchmarks.bench_startup [--runs 10] [--rows 2000] [--max-ms 0] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from benchmarks.html_generator import generate_html
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('requests', 'aiohttp', 'tqdm', 'PIL', 'src.downloader', 'src.zip_processor', 'src.video')
+
+
+def run(args):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', 'main.py'] + args, cwd=ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        raise RuntimeError(f"main.py {' '.join(args)} exited with {result.returncode}")
+
+    # -X importtime lines: "import time: self [us] | cumulative | package", indented by nesting depth
+    imports, top_level = {}, set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and line.count('|') == 2:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                imports[name.strip()] = int(cumulative)
+                if not name[1:].startswith(' '):
+                    top_level.add(name.strip())
+    return elapsed, imports, top_level
+
+
+def measure(args, runs):
+    times = []
+    for _ in range(runs):
+        elapsed, imports, top_level = run(args)
+        times.append(elapsed)
+    times.sort()
+    slowest = sorted(((imports[name], name) for name in top_level), reverse=True)
+    return {
+        'median_ms': round(times[len(times) // 2] * 1000, 1),
+        'min_ms': round(times[0] * 1000, 1),
+        'modules': len(imports),
+        'heavy_loaded': [name for name in HEAVY_MODULES if name in imports],
+        'slowest_imports_ms': {name: round(us / 1000, 1) for us, name in slowest[:8]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CLI startup")
+    parser.add_argument('--runs', type=int, default=10, help="interpreters started per scenario")
+    parser.add_argument('--rows', type=int, default=2000, help="memories in the HTML file of the dry run")
+    parser.add_argument('--max-ms', type=float, default=0, help="fail if a median exceeds this (0 = never)")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        html_file = os.path.join(tmp, "memories_history.html")
+        generate_html(html_file, args.rows)
+        scenarios = {
+            'help': ['--help'],
+            'dry_run': ['--dry-run', '--html-file', html_file, '--output-dir', os.path.join(tmp, 'out')],
+        }
+        results = {'config': vars(args),
+                   'scenarios': {name: measure(cli_args, args.runs) for name, cli_args in scenarios.items()}}
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    too_slow = [name for name, result in results['scenarios'].items()
+                if args.max_ms and result['median_ms'] > args.max_ms]
+    heavy = [name for name, result in results['scenarios'].items() if result['heavy_loaded']]
+    if too_slow or heavy:
+        print(f"Regression: slower than {args.max_ms} ms: {too_slow}, heavy imports: {heavy}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""End-to-end throughput of the parse, download and compose stages.
+
+Downloads go to a local mock CDN (benchmarks.mock_cdn), so runs are
+repeatable and need no Snapchat account. Each scenario runs in its own
+process so its peak RSS is its own. Results are printed as JSON (and
+written to --output) to track regressions between commits.
+
+Usage: python -m benchmarks.bench_suite [--rows 2000] [--scenarios parse,download,compose]
+                                        [--engine threads|async] [--workers 30] [--latency 0.02]
+                                        [--bandwidth 0] [--error-rate 0] [--content-types correct]
+                                        [--zips 100] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import multiprocessing
+from benchmarks.html_generator import generate_html
+from benchmarks.mock_cdn import MockCDN, build_payloads
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SCENARIOS = ('parse', 'download', 'compose')
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb():
+    """Peak RSS of this process and of its largest child (ru_maxrss is KB on Linux, bytes on macOS)"""
+    if resource is None:
+        return None, None
+    unit = 1 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return round(own / 1024 / 1024, 1), round(children / 1024 / 1024, 1)
+
+
+def report(count, size, elapsed, latencies, **extra):
+    own, children = peak_rss_mb()
+    result = {
+        'count': count,
+        'seconds': round(elapsed, 3),
+        'memories_per_sec': round(count / elapsed, 2) if elapsed else None,
+        'mb_per_sec': round(size / 1024 / 1024 / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+        'peak_rss_mb': own,
+        'peak_child_rss_mb': children,
+    }
+    result.update(extra)
+    return result
+
+
+def scenario_parse(html_file, **_):
+    from src.parser import HTMLParser
+
+    latencies = []
+    count = 0
+    start = last = time.perf_counter()
+    for _ in HTMLParser(html_file).iter_memories():
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+        count += 1
+    return report(count, os.path.getsize(html_file), time.perf_counter() - start, latencies)
+
+
+def scenario_download(html_file, output_dir, engine, workers, **_):
+    from src.parser import HTMLParser
+    from src.manifest import Manifest
+    from src.output_index import OutputIndex
+    from src.downloader import Downloader
+    from src.async_downloader import AsyncDownloader
+
+    manifest, index = Manifest(output_dir), OutputIndex(output_dir)
+    engine_class = AsyncDownloader if engine == 'async' else Downloader
+    downloader = engine_class(output_dir, workers, manifest=manifest, index=index)
+    latencies = []
+
+    # Time every memory from the start of its download to its final file
+    if engine == 'async':
+        download_single_async = downloader.download_single_async
+
+        async def timed(http, memory):
+            start = time.perf_counter()
+            result = await download_single_async(http, memory)
+            latencies.append(time.perf_counter() - start)
+            return result
+        downloader.download_single_async = timed
+    else:
+        download_single = downloader.download_single
+
+        def timed(memory):
+            start = time.perf_counter()
+            result = download_single(memory)
+            latencies.append(time.perf_counter() - start)
+            return result
+        downloader.download_single = timed
+
+    start = time.perf_counter()
+    downloader.download_all(HTMLParser(html_file).iter_memories())
+    elapsed = time.perf_counter() - start
+    return report(downloader.success_count, downloader.total_size, elapsed, latencies,
+                  failed=downloader.failed_count)
+
+
+def scenario_compose(zip_dir, **_):
+    from src.output_index import OutputIndex
+    from src.zip_processor import ZipProcessor
+
+    processor = ZipProcessor(zip_dir, 'both', index=OutputIndex(zip_dir))
+    size = sum(os.path.getsize(path) for path in processor.index.files_with_extension('.zip'))
+    submitted, latencies = {}, []
+
+    # Time every ZIP from its submission until its result is recorded
+    submit, record_zip_result = processor.submit, processor.record_zip_result
+
+    def timed_submit(zip_path, memory=None):
+        submitted[zip_path] = time.perf_counter()
+        submit(zip_path, memory)
+
+    def timed_record(zip_path, output_path):
+        latencies.append(time.perf_counter() - submitted[zip_path])
+        record_zip_result(zip_path, output_path)
+    processor.submit, processor.record_zip_result = timed_submit, timed_record
+
+    start = time.perf_counter()
+    processor.process_all()
+    elapsed = time.perf_counter() - start
+    return report(processor.processed_count, size, elapsed, latencies,
+                  failed=processor.failed_count, videos=processor.videos_count)
+
+
+def run_scenario(name, kwargs, queue):
+    # Progress bars and summaries would drown the JSON
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        result = globals()[f"scenario_{name}"](**kwargs)
+    queue.put(result)
+
+
+def isolated(name, **kwargs):
+    """Run a scenario in a fresh process, so its peak RSS is not inflated by the others"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=run_scenario, args=(name, kwargs, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def write_zips(zip_dir, count, payloads):
+    """count ZIPs named like downloaded ones, one in ten holding a video"""
+    os.makedirs(zip_dir, exist_ok=True)
+    for i in range(count):
+        kind = 'vzip' if i % 10 == 9 else 'zip'
+        with open(os.path.join(zip_dir, f"20240101_{i // 3600:02d}{i // 60 % 60:02d}{i % 60:02d}.zip"), 'wb') as f:
+            f.write(payloads[kind])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parse, download and compose stages")
+    parser.add_argument('--rows', type=int, default=2000, help="memories in the generated HTML file")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--engine', choices=('threads', 'async'), default='threads')
+    parser.add_argument('--workers', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.02, help="mock CDN delay per response (seconds)")
+    parser.add_argument('--bandwidth', type=float, default=0.0, help="mock CDN MB/s per response (0 = unlimited)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--content-types', choices=('correct', 'generic', 'none'), default='correct')
+    parser.add_argument('--zips', type=int, default=100, help="ZIPs processed by the compose scenario")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(',') if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    payloads = build_payloads()
+    results = {'config': vars(args), 'payload_bytes': {kind: len(data) for kind, data in payloads.items()},
+               'scenarios': {}}
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            MockCDN(args.latency, args.bandwidth * 1024 * 1024 or None, args.error_rate,
+                    content_types=args.content_types, payloads=payloads) as cdn:
+        html_file = os.path.join(tmp, "memories_history.html")
+        generate_html(html_file, args.rows, cdn.url)
+
+        if 'parse' in scenarios:
+            results['scenarios']['parse'] = isolated('parse', html_file=html_file)
+        if 'download' in scenarios:
+            results['scenarios']['download'] = isolated(
+                'download', html_file=html_file, output_dir=os.path.join(tmp, "download"),
+                engine=args.engine, workers=args.workers)
+            results['scenarios']['download']['cdn'] = dict(cdn.stats)
+        if 'compose' in scenarios:
+            zip_dir = os.path.join(tmp, "compose")
+            write_zips(zip_dir, args.zips, payloads)
+            results['scenarios']['compose'] = isolated('compose', zip_dir=zip_dir)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Generate a synthetic memories_history.html of any size.
+
+Rows cycle through plain photos, plain videos and ZIPs (media + overlay),
+and each download URL points at BASE_URL/<payload kind>, so the file can
+be served by benchmarks.mock_cdn.
+
+Usage: python -m benchmarks.html_generator output.html rows [base_url]
+"""
+import sys
+
+BASE_URL = "https://app.snapchat.com/dmd/memories"
+
+# Out of every 20 memories: 12 photos, 2 photo ZIPs, 5 videos, 1 video ZIP
+PAYLOAD_MIX = ('jpg',) * 12 + ('zip',) * 2 + ('mp4',) * 5 + ('vzip',)
+VIDEO_KINDS = ('mp4', 'vzip')
+
+
+def payload_kind(i):
+    return PAYLOAD_MIX[i % len(PAYLOAD_MIX)]
+
+
+def generate_html(path, rows, base_url=BASE_URL):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("<html><body><table>\n")
+        for i in range(rows):
+            kind = payload_kind(i)
+            media_type = "Video" if kind in VIDEO_KINDS else "Image"
+            f.write(
+                f"<tr><td>{2015 + i % 10}-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:{i // 60 % 60:02d} UTC</td>"
+                f"<td>{media_type}</td><td>Latitude, Longitude: 48.{i % 1000:03d}, 2.{i % 997:03d}</td>"
+                f"<td><a href=\"#\" onclick=\"downloadMemories('{base_url}/{kind}?mid={i:08x}"
+                f"&ts=1700000000&sig={'a' * 64}', this, true); return false;\">Download</a></td></tr>\n")
+        f.write("</table></body></html>\n")
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    generate_html(sys.argv[1], int(sys.argv[2]), *sys.argv[3:4])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Local stand-in for Snapchat's media CDN.
+
+Serves synthetic payloads at /jpg, /mp4, /zip (photo + overlay) and /vzip
+(video + overlay); the query string is ignored. Latency, per-response
+bandwidth, error rate and Content-Type behavior are configurable, and
+Range requests are honored.
+
+Usage: python -m benchmarks.mock_cdn [--port 8000] [--latency 0.05] [--bandwidth 5]
+                                     [--error-rate 0.01] [--content-types correct|generic|none]
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import zipfile
+from io import BytesIO
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from PIL import Image, ImageDraw
+
+CONTENT_TYPES = {
+    'jpg': 'image/jpeg',
+    'mp4': 'video/mp4',
+    'zip': 'application/zip',
+    'vzip': 'application/zip',
+}
+WRITE_SIZE = 64 * 1024
+
+
+def make_jpeg(size=(1080, 1920), quality=85):
+    buffer = BytesIO()
+    Image.effect_noise(size, 40).convert('RGB').save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def make_overlay(size=(540, 960)):
+    overlay = Image.new('RGBA', size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    draw.rectangle((0, size[1] // 2, size[0], size[1] // 2 + 40), fill=(0, 0, 0, 150))
+    buffer = BytesIO()
+    overlay.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def make_mp4(seconds=2, size_mb=4):
+    """A real clip if ffmpeg is installed, otherwise random bytes behind an MP4 header"""
+    if shutil.which('ffmpeg'):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clip.mp4")
+            cmd = ['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', f"testsrc=size=720x1280:rate=30:duration={seconds}",
+                   '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p', '-y', path]
+            try:
+                subprocess.run(cmd, check=True, capture_output=True)
+                with open(path, 'rb') as f:
+                    return f.read()
+            except Exception:
+                pass
+    return b'\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom' + os.urandom(size_mb * 1024 * 1024)
+
+
+def make_zip(extension, media_data, overlay_data):
+    """Laid out like Snapchat's exports: <id>-main.<ext> and <id>-overlay.png"""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+        zip_file.writestr(f"0a1b2c3d-main.{extension}", media_data)
+        zip_file.writestr("0a1b2c3d-overlay.png", overlay_data)
+    return buffer.getvalue()
+
+
+def build_payloads():
+    jpeg, mp4, overlay = make_jpeg(), make_mp4(), make_overlay()
+    return {
+        'jpg': jpeg,
+        'mp4': mp4,
+        'zip': make_zip('jpg', jpeg, overlay),
+        'vzip': make_zip('mp4', mp4, overlay),
+    }
+
+
+class MockCDNHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        cdn = self.server.cdn
+        kind = self.path.split('?')[0].strip('/')
+        cdn.count('requests')
+
+        if cdn.latency:
+            time.sleep(cdn.latency)
+
+        if kind not in cdn.payloads:
+            self.send_error(404)
+            return
+        if cdn.error_rate and cdn.rng.random() < cdn.error_rate:
+            cdn.count('errors')
+            self.send_response(cdn.error_status)
+            self.send_header('Content-Length', '0')
+            self.send_header('Retry-After', '1')
+            self.end_headers()
+            return
+
+        data = cdn.payloads[kind]
+        start = 0
+        range_header = self.headers.get('Range', '')
+        if range_header.startswith('bytes=') and range_header.endswith('-'):
+            start = int(range_header[6:-1])
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(data)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+
+        content_type = cdn.content_type(kind)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data) - start))
+        self.send_header('ETag', f'"{kind}"')
+        self.end_headers()
+        self.send_body(data[start:], cdn.bandwidth)
+        cdn.count('bytes', len(data) - start)
+
+    def send_body(self, body, bandwidth):
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        # Each response is throttled on its own, like a per-connection CDN limit
+        for offset in range(0, len(body), WRITE_SIZE):
+            chunk = body[offset:offset + WRITE_SIZE]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / bandwidth)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockCDN:
+    """Runs the mock CDN in a background thread; use as a context manager.
+
+    bandwidth is in bytes/sec per response. content_types is 'correct',
+    'generic' (application/octet-stream, so the type must be sniffed) or
+    'none' (no Content-Type header at all).
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None, error_rate=0.0, error_status=503,
+                 content_types='correct', port=0, payloads=None, seed=0):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.content_types = content_types
+        self.payloads = payloads or build_payloads()
+        self.rng = random.Random(seed)
+        self.stats = {'requests': 0, 'errors': 0, 'bytes': 0}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), MockCDNHandler)
+        self.server.daemon_threads = True
+        self.server.cdn = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def content_type(self, kind):
+        if self.content_types == 'generic':
+            return 'application/octet-stream'
+        if self.content_types == 'none':
+            return None
+        return CONTENT_TYPES[kind]
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic Snapchat memories locally")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds before each response")
+    parser.add_argument('--bandwidth', type=float, default=0.0, help="MB/s per response (0 = unlimited)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--content-types', choices=('correct', 'generic', 'none'), default='correct')
+    args = parser.parse_args()
+
+    cdn = MockCDN(args.latency, args.bandwidth * 1024 * 1024 or None, args.error_rate,
+                  content_types=args.content_types, port=args.port)
+    print(f"Serving {', '.join(cdn.payloads)} at {cdn.url} (Ctrl+C to stop)")
+    try:
+        cdn.server.serve_forever()
+    except KeyboardInterrupt:
+        cdn.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,325 @@
 #!/usr/bin/env python3
 
+import os
 import sys
-from src.config import HTML_FILE, OUTPUT_DIR, MAX_WORKERS
-from src.parser import HTMLParser
-from src.downloader import Downloader
-from src.zip_processor import ZipProcessor
-from src.utils import print_color, Colors, ask_organization_mode, \
-    ask_filename_format
+import argparse
+from src import config, settings
+from src.utils import print_color, Colors, format_size, \
+    ask_organization_mode, ask_filename_format, ask_zip_mode
+
+# Used for unset choices with --non-interactive
+RECOMMENDED = {'ORGANIZATION_MODE': 'by_date', 'FILENAME_FORMAT': '1',
+               'ZIP_MODE': 'both'}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Download all your Snapchat Memories in bulk")
+    parser.add_argument('--retry-failed', action='store_true',
+                        help="only retry the memories that failed in the last run "
+                             "(listed in OUTPUT_DIR/failed.jsonl)")
+    parser.add_argument('--batch', nargs='+', metavar='PATH',
+                        help="download several exports (HTML files, or folders "
+                             "searched for them) into OUTPUT_DIR/<export>")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="write per-phase timings to PATH (JSON, or a "
+                             "Prometheus textfile if it ends in .prom)")
+    parser.add_argument('--dry-run', '--list', action='store_true',
+                        help="parse the export and show what would be "
+                             "downloaded, without downloading anything")
+    settings.add_arguments(parser)
+
+    args = parser.parse_args()
+    try:
+        settings.load(args)
+    except (OSError, settings.SettingsError) as e:
+        parser.error(str(e))
+    return args
+
+
+def choose(name, ask, non_interactive):
+    """A configured choice, else the recommended one or the user's answer"""
+    value = getattr(config, name)
+    if value is None:
+        value = RECOMMENDED[name] if non_interactive else ask()
+    return value
+
+
+def print_plan(memories, manifest, index, scheduler):
+    """--dry-run: report what a real run would do; returns (pending, estimated bytes)"""
+    from src.sync import media_id
+
+    pending = [memory for memory in memories
+               if manifest.completed_path(memory.url, index) is None]
+    videos = sum(memory.kind == 'video' for memory in memories)
+    pending_videos = sum(memory.kind == 'video' for memory in pending)
+    size = sum(scheduler.size_hint(memory) for memory in pending)
+    failed_ids = manifest.failed_ids()
+    failed = sum(media_id(memory.url) in failed_ids for memory in pending)
+
+    print_color(f"📋 {len(memories)} memories: {len(memories) - videos} "
+                f"images, {videos} videos", Colors.BOLD)
+    print_color(f"✓ Already downloaded: {len(memories) - len(pending)}",
+                Colors.GREEN)
+    print_color(f"📥 To download: {len(pending)} "
+                f"({len(pending) - pending_videos} images, {pending_videos} "
+                f"videos), about {format_size(size)}", Colors.CYAN)
+    if failed:
+        print_color(f"🔁 Failed in an earlier run: {failed}", Colors.YELLOW)
+    return len(pending), size
+
+
+def keep_parsed(memories, parsed):
+    """Yield the memories, adding each one to the parsed list"""
+    for memory in memories:
+        parsed.append(memory)
+        yield memory
 
 
 def main():
+    args = parse_args()
+
+    # Imported once the settings are applied: modules copy src.config values
+    # when they are imported. The network and imaging stacks (requests,
+    # aiohttp, tqdm, Pillow) are only loaded below, once a download is due.
+    from src.parser import HTMLParser
+    from src.manifest import Manifest
+    from src.output_index import OutputIndex
+    from src.metrics import Metrics
+    from src.failures import FailureLog, EXPIRED_FILENAME
+    from src.sync import SyncIndex, media_id
+    from src.exports import find_exports
+    from src.scheduler import Scheduler, filter_dates, head_sizes
+
     print_color("\n" + "=" * 80, Colors.BLUE)
     print_color("📸 SNAPCHAT MEMORIES DOWNLOADER", Colors.BOLD)
     print_color("=" * 80 + "\n", Colors.BLUE)
 
-    organization_mode = ask_organization_mode()
-    filename_format = ask_filename_format()
-    zip_mode = ZipProcessor.ask_processing_mode()
+    # A dry run never prompts: the choices do not change what it reports
+    non_interactive = args.non_interactive or args.dry_run
+    organization_mode = choose('ORGANIZATION_MODE', ask_organization_mode,
+                               non_interactive)
+    filename_format = choose('FILENAME_FORMAT', ask_filename_format,
+                             non_interactive)
+    if not args.dry_run:
+        zip_mode = choose('ZIP_MODE', ask_zip_mode, non_interactive)
+        from src.downloader import Downloader
+        from src.async_downloader import AsyncDownloader
+        from src.zip_processor import ZipProcessor
+        from src.batch import BatchDownloader
 
-    parser = HTMLParser(HTML_FILE)
-    memories = parser.parse()
+    if args.batch:
+        exports = find_exports(args.batch)
+        if not exports:
+            print_color("❌ No HTML files found", Colors.RED)
+            sys.exit(1)
+    else:
+        exports = [(None, config.HTML_FILE)]
 
-    if not memories:
-        print_color("❌ No memories found in HTML file", Colors.RED)
-        sys.exit(1)
+    metrics = Metrics()
+    head_session = None
+    if not args.dry_run:
+        engine = AsyncDownloader if config.ENGINE == 'async' else Downloader
+        if config.HEAD_SIZES:
+            head_session = Downloader.create_session(config.MAX_WORKERS)
+    names, all_memories, downloaders, processors = [], [], [], []
+    # Ordering, filtering, diffing, retrying and planning need every memory
+    # at once; otherwise the HTML file is parsed while the downloads run
+    streaming = not (args.batch or args.dry_run or args.retry_failed or
+                     config.SYNC or config.SINCE or config.UNTIL or
+                     config.HEAD_SIZES or config.SCHEDULE != 'html')
+    sync_indexes = []
+    planned_count = planned_size = 0
+
+    for name, html_file in exports:
+        output_dir = os.path.join(config.OUTPUT_DIR, name) if name else \
+            config.OUTPUT_DIR
+        if name:
+            print_color(f"\n📦 Export: {name} ({html_file})", Colors.BOLD)
+
+        failure_log = FailureLog(output_dir)
+        expired_log = FailureLog(output_dir, EXPIRED_FILENAME)
+        retry_from_log = args.retry_failed and (failure_log.exists() or
+                                                expired_log.exists())
+        if retry_from_log:
+            # The last run listed its failures: no need to parse the HTML
+            memories = []
+            if failure_log.exists():
+                memories = failure_log.load(organization_mode, filename_format)
+                print_color(f"🔁 Retrying {len(memories)} memories listed in "
+                            f"{failure_log.path}", Colors.BLUE)
+            if expired_log.exists():
+                # Expired links only work again with the links of a newer
+                # export, found by media ID
+                expired = expired_log.load(organization_mode, filename_format)
+                fresh = {media_id(memory.url): memory for memory in
+                         HTMLParser(html_file).iter_memories(prepare=False)} \
+                    if os.path.exists(html_file) else {}
+                renewed = [fresh[media_id(memory.url)].prepare(
+                    organization_mode, filename_format)
+                    for memory in expired if media_id(memory.url) in fresh
+                    and fresh[media_id(memory.url)].url != memory.url]
+                print_color(f"🔗 {len(renewed)} of {len(expired)} expired "
+                            f"links renewed from {html_file}", Colors.BLUE)
+                renewed_ids = {media_id(memory.url) for memory in renewed}
+                memories += renewed + [memory for memory in expired
+                                       if media_id(memory.url)
+                                       not in renewed_ids]
+            if not memories:
+                print_color(f"✅ Nothing to retry in {output_dir}",
+                            Colors.GREEN)
+                continue
+        elif streaming:
+            # Nothing needs the whole list first: downloads start with the
+            # first rows parsed, and the list fills up as they go
+            print_color("📄 Reading HTML file while downloading...",
+                        Colors.BLUE)
+            parsed = []
+            memories = keep_parsed(
+                HTMLParser(html_file, organization_mode,
+                           filename_format).iter_memories(), parsed)
+        else:
+            parser = HTMLParser(html_file, organization_mode, filename_format)
+            # With --sync, dates are only parsed for memories that survive the diff
+            memories = parser.parse(prepare=not config.SYNC)
+
+            if not memories:
+                print_color("❌ No memories found in HTML file", Colors.RED)
+                if not args.batch:
+                    sys.exit(1)
+                continue
+
+        sync_index = SyncIndex(output_dir)
+        if config.SYNC and not retry_from_log:
+            memories, unchanged = sync_index.diff(memories)
+            memories = [memory.prepare(organization_mode, filename_format)
+                        for memory in memories]
+            print_color(f"🔄 Sync: {len(memories)} new or changed memories, "
+                        f"{unchanged} unchanged since the last run",
+                        Colors.BLUE)
+            if not memories:
+                continue
+
+        if config.SINCE or config.UNTIL:
+            try:
+                memories = filter_dates(memories, config.SINCE, config.UNTIL)
+            except ValueError as e:
+                print_color(f"❌ {e}", Colors.RED)
+                sys.exit(1)
+            print_color(f"📅 {len(memories)} memories between "
+                        f"{config.SINCE or 'the start'} and "
+                        f"{config.UNTIL or 'today'}", Colors.BLUE)
+            if not memories:
+                continue
+
+        manifest = Manifest(output_dir)
+        index = OutputIndex(output_dir)
+
+        if args.retry_failed and not retry_from_log:
+            # Output folders from before failed.jsonl: use the manifest
+            failed_ids = manifest.failed_ids()
+            memories = [memory for memory in memories
+                        if media_id(memory.url) in failed_ids]
+            if not memories:
+                print_color(f"✅ Nothing to retry in {output_dir}",
+                            Colors.GREEN)
+                continue
+            print_color(f"🔁 Retrying {len(memories)} previously failed "
+                        f"memories", Colors.BLUE)
+
+        if args.dry_run:
+            pending, size = print_plan(memories, manifest, index,
+                                       Scheduler(config.SCHEDULE, manifest))
+            planned_count += pending
+            planned_size += size
+            continue
+
+        sizes = None
+        if head_session is not None:
+            pending = [memory for memory in memories
+                       if manifest.completed_path(memory.url, index) is None]
+            sizes = head_sizes(pending, head_session, config.MAX_WORKERS)
+        if not streaming:
+            memories = Scheduler(config.SCHEDULE, manifest,
+                                 sizes).order(memories)
+
+        downloader = engine(output_dir, config.MAX_WORKERS,
+                            organization_mode, filename_format, manifest,
+                            index, metrics)
+        processor = ZipProcessor(output_dir, zip_mode, filename_format,
+                                 manifest, keep_zips=config.KEEP_ZIPS,
+                                 index=index, metrics=metrics)
+        if not config.KEEP_ZIPS:
+            downloader.zip_handler = processor.process_payload
+
+        names.append(name)
+        sync_indexes.append(sync_index)
+        # Later stages go through them again once the downloads are done
+        all_memories.append(parsed if streaming else memories)
+        downloaders.append(downloader)
+        processors.append(processor)
+
+    if head_session is not None:
+        head_session.close()
+    if args.dry_run:
+        print_color(f"\n🧪 Dry run: {planned_count} memories (about "
+                    f"{format_size(planned_size)}) would be downloaded with "
+                    f"the {config.ENGINE} engine, {config.MAX_WORKERS} "
+                    f"workers, in {config.SCHEDULE} order", Colors.BLUE)
+        return
+    if not downloaders:
+        return
+
+    if args.batch:
+        # One engine for every export. Downloaded ZIPs are processed while the
+        # downloads continue, in pools the exports share; the last export's
+        # processor owns them, as it finishes last. Saved ZIPs (--keep-zips)
+        # are processed export by export afterwards, so --pipeline does not
+        # apply
+        if not config.KEEP_ZIPS:
+            processors[-1].start(position=len(processors))
+            for position, processor in enumerate(processors[:-1], 1):
+                processor.start(position=position, shared=processors[-1])
+        BatchDownloader(downloaders, names).download_all(all_memories)
+        for name, processor in zip(names, processors):
+            print_color(f"\n📦 Export: {name}", Colors.BOLD)
+            processor.process_all()
+    else:
+        if config.PIPELINE or not config.KEEP_ZIPS:
+            # ZIPs are processed while the downloads continue
+            processor.start(position=1)
+        if config.PIPELINE:
+            downloader.on_file_ready = processor.submit_file
+        downloader.download_all(memories)
+        if config.PIPELINE:
+            processor.finish()
+        else:
+            # Also processes ZIPs an earlier run saved
+            processor.process_all()
+        if streaming and not parsed:
+            print_color("❌ No memories found in HTML file", Colors.RED)
+            sys.exit(1)
+
+    if config.WRITE_METADATA:
+        # Last, so composed ZIP outputs get their metadata too
+        from src.metadata import MetadataWriter
+        for name, downloader, memories in zip(names, downloaders,
+                                              all_memories):
+            if name:
+                print_color(f"\n📦 Export: {name}", Colors.BOLD)
+            MetadataWriter(downloader.output_dir, downloader.manifest,
+                           downloader.index, metrics).write_all(memories)
 
-    downloader = Downloader(OUTPUT_DIR, MAX_WORKERS, organization_mode,
-                            filename_format)
-    downloader.download_all(memories)
+    for sync_index, downloader, memories in zip(sync_indexes, downloaders,
+                                                all_memories):
+        sync_index.save(memories, downloader.manifest)
+        downloader.manifest.close()
 
-    processor = ZipProcessor(OUTPUT_DIR, zip_mode, filename_format)
-    processor.process_all()
+    for line in metrics.summary_lines():
+        print_color(line, Colors.CYAN)
+    if args.metrics:
+        metrics.export(args.metrics)
+        print_color(f"📈 Metrics written to {args.metrics}", Colors.BLUE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from .downloader import Downloader, IncompleteDownload, PermanentFailure, PERMANENT_STATUSES, USER_AGENT, \
+    is_congestion_status, retry_delay, failure_cause
+from .concurrency import parse_retry_after
+from .utils import print_color, Colors
+from .config import TIMEOUT, MAX_RETRIES, CHUNK_SIZE, JOBS_PER_WORKER
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+def timing_trace():
+    """aiohttp hooks writing DNS and connect times of new connections into the request's trace_request_ctx"""
+    async def on_dns_start(session, context, params):
+        context.dns_start = time.perf_counter()
+
+    async def on_dns_end(session, context, params):
+        context.trace_request_ctx['dns'] = time.perf_counter() - context.dns_start
+
+    async def on_connect_start(session, context, params):
+        context.connect_start = time.perf_counter()
+
+    async def on_connect_end(session, context, params):
+        # Connection creation includes the DNS lookup, which is reported on its own
+        timings = context.trace_request_ctx
+        timings['connect'] = time.perf_counter() - context.connect_start - timings.get('dns', 0.0)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_dns_resolvehost_start.append(on_dns_start)
+    trace.on_dns_resolvehost_end.append(on_dns_end)
+    trace.on_connection_create_start.append(on_connect_start)
+    trace.on_connection_create_end.append(on_connect_end)
+    return trace
+
+
+class AsyncDownloader(Downloader):
+    """Same API as Downloader, but downloads run as asyncio tasks on one event loop.
+
+    A fixed set of worker tasks pulls memories from a bounded queue, so the
+    number of in-flight downloads (and open connections) never exceeds
+    max_workers, however many memories there are.
+    """
+
+    def __init__(self, output_dir, max_workers, organization_mode='by_date', filename_format='1', manifest=None,
+                 index=None, metrics=None):
+        super().__init__(output_dir, max_workers, organization_mode, filename_format, manifest, index, metrics)
+        # The requests session is never used by this engine
+        self.session.close()
+
+    async def stream_to_file_async(self, http, memory, part_path):
+        offset, headers = self.resume_headers(memory, part_path)
+        limiter = self.limiters.for_url(memory.url)
+        await limiter.acquire_async()
+        trace_timings = {}
+        try:
+            start = time.monotonic()
+            async with http.get(memory.url, headers=headers, trace_request_ctx=trace_timings) as response:
+                latency = time.monotonic() - start
+                if response.status in PERMANENT_STATUSES:
+                    raise PermanentFailure(response.status)
+                if is_congestion_status(response.status):
+                    limiter.on_congestion(parse_retry_after(response.headers.get('Retry-After')))
+                sink, expected, complete = self.open_sink(memory, part_path, response.status,
+                                                          response.headers, offset)
+                sink.timings.update(trace_timings, ttfb=latency)
+                if not complete:
+                    response.raise_for_status()
+                    transfer_start = time.perf_counter()
+                    try:
+                        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                            sink.write(chunk)
+                    except BaseException:
+                        sink.discard()
+                        raise
+                    sink.timings['transfer'] = time.perf_counter() - transfer_start - sink.timings['write']
+                sink.close()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            limiter.on_congestion()
+            raise
+        finally:
+            limiter.release()
+
+        limiter.on_success(latency, sink.size - sink.offset)
+        self.check_complete(sink, expected)
+        return sink.media, sink
+
+    @staticmethod
+    async def off_loop(blocking, function, *args):
+        """Call function, in the default executor if it may block.
+
+        Queuing a ZIP for processing blocks while PIPELINE_QUEUE_SIZE are
+        waiting (and a saved one is opened to count its kind), which would
+        stall every transfer on the event loop.
+        """
+        if blocking:
+            return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+        return function(*args)
+
+    async def download_single_async(self, http, memory):
+        try:
+            start = time.perf_counter()
+            target_dir, date_formatted = self.resolve_target(memory)
+
+            # A ZIP left by an earlier run goes to on_file_ready, whose queue may be full
+            existing = await self.off_loop(self.on_file_ready is not None, self.find_existing,
+                                           memory, target_dir, date_formatted)
+            if existing:
+                return existing
+
+            part_path = self.part_path(memory, target_dir, date_formatted)
+            for attempt in range(MAX_RETRIES):
+                try:
+                    media, sink = await self.stream_to_file_async(http, memory, part_path)
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError, IncompleteDownload):
+                    if attempt < MAX_RETRIES - 1:
+                        await asyncio.sleep(retry_delay(attempt))
+                    else:
+                        raise
+
+            result = await self.off_loop(media.kind == 'zip' or sink.payload, self.finalize,
+                                         memory, part_path, target_dir, date_formatted, media, sink)
+            return self.with_timings(result, sink, attempt, start)
+
+        except PermanentFailure as e:
+            self.manifest.record(memory.url, 'expired', error=str(e))
+            return {'status': 'expired', 'url': memory.url, 'error': str(e), 'cause': failure_cause(e)}
+        except (aiohttp.ClientError, asyncio.TimeoutError, IncompleteDownload) as e:
+            error = str(e) or type(e).__name__
+            self.manifest.record(memory.url, 'failed', error=error)
+            return {'status': 'failed', 'url': memory.url, 'error': error, 'cause': failure_cause(e)}
+        except Exception as e:
+            self.manifest.record(memory.url, 'error', error=str(e))
+            return {'status': 'error', 'url': memory.url, 'error': str(e), 'cause': failure_cause(e)}
+
+    async def worker(self, http, queue, pbar):
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            downloader, memory = job
+            result = await downloader.download_single_async(http, memory)
+            downloader.record_result(memory, result, pbar)
+
+    async def run(self, jobs, pbar):
+        connector = aiohttp.TCPConnector(limit=self.max_workers, limit_per_host=self.max_workers)
+        timeout = aiohttp.ClientTimeout(sock_connect=TIMEOUT, sock_read=TIMEOUT)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers={'User-Agent': USER_AGENT},
+                                         trace_configs=[timing_trace()]) as http:
+            queue = asyncio.Queue(maxsize=self.max_workers * JOBS_PER_WORKER)
+            workers = [asyncio.create_task(self.worker(http, queue, pbar))
+                       for _ in range(self.max_workers)]
+
+            for job in jobs:
+                await queue.put(job)
+            for _ in workers:
+                await queue.put(None)
+
+            await asyncio.gather(*workers)
+
+    def run_jobs(self, jobs, pbar):
+        if aiohttp is None:
+            raise RuntimeError("The async engine requires aiohttp: pip install aiohttp")
+        asyncio.run(self.run(jobs, pbar))
+
+    def download_all(self, memories):
+        if aiohttp is None:
+            print_color("❌ The async engine requires aiohttp: pip install aiohttp", Colors.RED)
+            return
+
+        self.start_run(memories)
+
+        print_color(f"\n🚀 Starting download of {self.total or 'all'} memories with up to {self.max_workers} async tasks...\n", Colors.BOLD)
+
+        with self.progress_bar() as pbar:
+            self.run_jobs(((self, memory) for memory in memories), pbar)
+
+        self.print_summary()
@@ -0,0 +1,94 @@
+import time
+import heapq
+from itertools import repeat
+from tqdm import tqdm
+from .utils import print_color, Colors, format_size
+from .concurrency import HostLimiters
+from .scheduler import expiry_key
+from .config import SCHEDULE
+
+
+def interleave(work):
+    """Yield (downloader, memory) jobs round-robin across exports, so none waits for another to finish"""
+    iterators = [(downloader, iter(memories)) for downloader, memories in work]
+    while iterators:
+        for item in list(iterators):
+            downloader, memories = item
+            memory = next(memories, None)
+            if memory is None:
+                iterators.remove(item)
+            else:
+                yield downloader, memory
+
+
+def merge_by_expiry(work):
+    """Yield (downloader, memory) jobs across exports, links closest to expiry first (each export is sorted)"""
+    return heapq.merge(*(zip(repeat(downloader), memories) for downloader, memories in work),
+                       key=lambda job: expiry_key(job[1]))
+
+
+class BatchProgress:
+    """The progress bar shared by every export; its postfix shows the totals of the whole batch"""
+
+    def __init__(self, pbar, batch):
+        self.pbar = pbar
+        self.batch = batch
+
+    def set_postfix_str(self, _):
+        self.pbar.set_postfix_str(self.batch.status_line())
+
+    def update(self, n=1):
+        self.pbar.update(n)
+
+
+class BatchDownloader:
+    """Downloads several exports through one engine: one worker pool, one connection pool and
+    one set of host limiters, so MAX_WORKERS bounds the whole batch rather than each export.
+
+    Each export keeps its own Downloader (output tree, manifest, index, ZIP
+    handler and counters); the first one runs the shared workers.
+    """
+
+    def __init__(self, downloaders, names):
+        self.downloaders = downloaders
+        self.names = names
+        self.lead = downloaders[0]
+        self.limiters = HostLimiters(self.lead.max_workers)
+        self.session = self.lead.create_session(self.lead.max_workers)
+        for downloader in downloaders:
+            downloader.session.close()
+            downloader.session = self.session
+            downloader.limiters = self.limiters
+
+    def total(self, attribute):
+        return sum(getattr(downloader, attribute) for downloader in self.downloaders)
+
+    def status_line(self):
+        return (f"✓ {self.total('success_count')} | ⊘ {self.total('skipped_count')} | ✗ {self.total('failed_count')}"
+                f" | ⚡ {self.limiters.total_limit()} | {format_size(self.limiters.throughput())}/s")
+
+    def download_all(self, exports_memories):
+        work = list(zip(self.downloaders, exports_memories))
+        for downloader, memories in work:
+            downloader.start_run(memories)
+        start_time = time.time()
+
+        print_color(f"\n🚀 Starting download of {sum(len(memories) for memories in exports_memories)} memories "
+                    f"from {len(work)} exports with up to {self.lead.max_workers} workers in total...\n", Colors.BOLD)
+
+        with tqdm(total=self.total('total'), desc="📥 Download", unit="memory",
+                  bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
+                  colour="green", position=0) as pbar:
+            # Older exports' links die first, so they go first instead of taking turns
+            jobs = merge_by_expiry(work) if SCHEDULE == 'expiring' else interleave(work)
+            self.lead.run_jobs(jobs, BatchProgress(pbar, self))
+
+        self.session.close()
+        for name, downloader in zip(self.names, self.downloaders):
+            print_color(f"\n📦 Export: {name}", Colors.BOLD)
+            downloader.print_summary()
+
+        elapsed = time.time() - start_time
+        print_color(f"🧮 Batch: {len(work)} exports, ✓ {self.total('success_count')} | "
+                    f"⊘ {self.total('skipped_count')} | ✗ {self.total('failed_count')}, "
+                    f"{format_size(self.total('total_size'))} in {elapsed:.2f} seconds", Colors.CYAN)
@@ -0,0 +1,144 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from .config import MIN_WORKERS, INITIAL_WORKERS, BACKOFF_FACTOR, LATENCY_TOLERANCE
+
+THROUGHPUT_WINDOW = 10.0
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds requested by a Retry-After header, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one host.
+
+    The limit grows by one after a full window of healthy requests (latency
+    within LATENCY_TOLERANCE of the best seen) and is multiplied by
+    BACKOFF_FACTOR on throttling or server errors. A Retry-After pauses every
+    worker on the host, not just the one that received it.
+    """
+
+    def __init__(self, maximum, initial=INITIAL_WORKERS, minimum=MIN_WORKERS):
+        self.maximum = maximum
+        self.minimum = min(minimum, maximum)
+        self.limit = max(self.minimum, min(initial, maximum))
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.successes = 0
+        self.latency = None
+        self.best_latency = None
+        self.last_decrease = 0.0
+        self.completed = deque()
+        self.condition = threading.Condition()
+
+    def try_acquire(self):
+        with self.condition:
+            if self.in_flight < self.limit and time.monotonic() >= self.paused_until:
+                self.in_flight += 1
+                return True
+            return False
+
+    def wait_time(self):
+        return max(0.05, self.paused_until - time.monotonic())
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    self.condition.wait(self.paused_until - now)
+                elif self.in_flight >= self.limit:
+                    self.condition.wait()
+                else:
+                    self.in_flight += 1
+                    return
+
+    async def acquire_async(self):
+        while not self.try_acquire():
+            await asyncio.sleep(min(self.wait_time(), 1.0))
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def on_success(self, latency, size=0):
+        with self.condition:
+            now = time.monotonic()
+            self.completed.append((now, size))
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if self.best_latency is None or self.latency < self.best_latency:
+                self.best_latency = self.latency
+
+            self.successes += 1
+            if self.successes >= self.limit and self.latency <= self.best_latency * LATENCY_TOLERANCE:
+                self.successes = 0
+                if self.limit < self.maximum:
+                    self.limit += 1
+                    self.condition.notify()
+
+    def on_congestion(self, retry_after=None):
+        with self.condition:
+            now = time.monotonic()
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+            # Errors from requests that were already in flight belong to the same event
+            cooldown = self.latency or 1.0
+            if now - self.last_decrease >= cooldown:
+                self.limit = max(self.minimum, int(self.limit * BACKOFF_FACTOR))
+                self.last_decrease = now
+            self.successes = 0
+
+    def throughput(self):
+        """Bytes per second completed over the last THROUGHPUT_WINDOW seconds"""
+        with self.condition:
+            cutoff = time.monotonic() - THROUGHPUT_WINDOW
+            while self.completed and self.completed[0][0] < cutoff:
+                self.completed.popleft()
+            return sum(size for _, size in self.completed) / THROUGHPUT_WINDOW
+
+
+class HostLimiters:
+    """One AdaptiveLimiter per host, created on first use"""
+
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            limiter = self.limiters.get(host)
+            if limiter is None:
+                limiter = self.limiters[host] = AdaptiveLimiter(self.maximum)
+            return limiter
+
+    def all(self):
+        with self.lock:
+            return list(self.limiters.values())
+
+    def total_limit(self):
+        return sum(limiter.limit for limiter in self.all())
+
+    def throughput(self):
+        return sum(limiter.throughput() for limiter in self.all())
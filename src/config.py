@@ -1,7 +1,61 @@
+import os
+
 HTML_FILE = "html/memories_history.html"
 OUTPUT_DIR = "snapchat_memories"
+
+# Choices asked at startup when left to None (see src/settings.py for overrides)
+ORGANIZATION_MODE = None
+FILENAME_FORMAT = None
+ZIP_MODE = None
+
+ENGINE = "threads"
+PIPELINE = False
+KEEP_ZIPS = False
+
+# Download order: "html", "newest", "images-first" or "mixed" (largest and smallest files alternate)
+SCHEDULE = "html"
+# Only download memories that are new or changed since the last run (see src/sync.py)
+SYNC = False
+# Only memories in this date range (YYYY-MM-DD, both included), None for no limit
+SINCE = None
+UNTIL = None
+# Ask the server for each file's size (one HEAD request per memory) to order them
+HEAD_SIZES = False
+# Sizes assumed when neither an earlier run nor a HEAD request tells
+IMAGE_SIZE_ESTIMATE = 500 * 1024
+VIDEO_SIZE_ESTIMATE = 5 * 1024 * 1024
+
 MAX_WORKERS = 30
+MIN_WORKERS = 2
+INITIAL_WORKERS = 10
 TIMEOUT = 30
+# Downloads queued or running per worker: only this many memories are in flight, however large the export
+JOBS_PER_WORKER = 2
 
 MAX_RETRIES = 3
 RETRY_DELAY = 2
+
+CHUNK_SIZE = 256 * 1024
+
+# What to do with content already stored under another URL: "link" (hardlink), "skip" or "off"
+DEDUP_MODE = "link"
+
+# Upper bounds (seconds) of the per-phase timing histograms
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+BACKOFF_FACTOR = 0.5
+LATENCY_TOLERANCE = 2.0
+
+ZIP_WORKERS = os.cpu_count() or 1
+FFMPEG_JOBS = max(1, (os.cpu_count() or 1) // 4)
+PIPELINE_QUEUE_SIZE = 64
+
+# Embed capture time and GPS position into photos (EXIF) and videos once they are downloaded
+WRITE_METADATA = False
+METADATA_WORKERS = os.cpu_count() or 1
+
+VIDEO_CODEC = "libx264"
+VIDEO_PRESET = "veryfast"
+VIDEO_CRF = 23
+# Threads per ffmpeg job, so FFMPEG_JOBS jobs together use every core (0 lets ffmpeg decide)
+VIDEO_THREADS = max(1, (os.cpu_count() or 1) // FFMPEG_JOBS)
@@ -1,185 +1,570 @@
 import os
+import re
 import time
+import hashlib
+import random
 from pathlib import Path
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
-from .utils import print_color, Colors, format_size, format_filename_date
-from .config import TIMEOUT, MAX_RETRIES, RETRY_DELAY
+from .utils import print_color, Colors, format_size
+from .manifest import Manifest
+from .output_index import OutputIndex
+from .metrics import Metrics
+from .failures import FailureLog, EXPIRED_FILENAME
+from .sync import media_id
+from .sniff import sniff, SNIFF_SIZE
+from .concurrency import HostLimiters, parse_retry_after
+from .config import TIMEOUT, MAX_RETRIES, RETRY_DELAY, CHUNK_SIZE, DEDUP_MODE, JOBS_PER_WORKER
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+PART_SUFFIX = '.part'
+# Failures listed in the summary; all of them are in failed.jsonl
+FAILURES_SHOWN = 10
+# Answers to a signed link that no retry can change: it expired, or never was valid
+PERMANENT_STATUSES = (401, 403, 404, 410)
+
+CONTENT_RANGE_PATTERN = re.compile(r'bytes (?:(\d+)-\d+|\*)/(\d+)')
+
+
+class IncompleteDownload(requests.exceptions.RequestException):
+    """The body ended before the announced Content-Length, or a range did not continue the part file"""
+
+
+class PermanentFailure(requests.exceptions.RequestException):
+    """The link was refused for good (expired or forbidden): it fails at once, without retries"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}: link expired or forbidden")
+        self.status = status
+
+
+def parse_content_range(value):
+    """Return (start, total) from a Content-Range header ('bytes 0-99/500' or 'bytes */500'), or None"""
+    match = CONTENT_RANGE_PATTERN.match(value or '')
+    if not match:
+        return None
+    start = match.group(1)
+    return (int(start) if start is not None else None), int(match.group(2))
+
+
+def is_congestion_status(status):
+    return status == 429 or status >= 500
+
+
+def failure_cause(error):
+    """Short label of why a download failed (HTTP 403, timeout, ...), for the summary's counts"""
+    status = getattr(error, 'status', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if status:
+        return f"HTTP {status}"
+    if isinstance(error, IncompleteDownload):
+        return "incomplete"
+    name = type(error).__name__.lower()
+    if 'timeout' in name:
+        return "timeout"
+    if 'connect' in name:
+        return "connection"
+    return type(error).__name__
+
+
+def retry_delay(attempt):
+    # Jitter keeps workers that failed together from retrying together
+    return RETRY_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class DownloadSink:
+    """Writes a response body to disk while tracking its size, checksum and first bytes.
+
+    With extract_zips, a ZIP body is marked as a payload: it is extracted
+    from the part file, which never gets a name in the output folder.
+    """
+
+    HEAD_SIZE = SNIFF_SIZE
+
+    def __init__(self, path, content_type='', extract_zips=False, offset=0):
+        self.path = path
+        self.content_type = content_type
+        self.extract_zips = extract_zips
+        self.file = None
+        self.head = b''
+        self.size = 0
+        self.offset = offset
+        self.digest = hashlib.sha256()
+        # Filled in by the downloader; write is the time spent in disk writes
+        self.timings = {'write': 0.0}
+        if offset:
+            self.resume()
+
+    def resume(self):
+        """Continue an existing part file: its bytes count towards the head, size and checksum"""
+        with open(self.path, 'rb') as f:
+            while self.size < self.offset:
+                chunk = f.read(min(CHUNK_SIZE, self.offset - self.size))
+                if not chunk:
+                    break
+                self.track(chunk)
+        self.file = open(self.path, 'ab')
+        self.file.truncate(self.size)
+
+    def track(self, chunk):
+        if len(self.head) < self.HEAD_SIZE:
+            self.head += chunk[:self.HEAD_SIZE - len(self.head)]
+        self.digest.update(chunk)
+        self.size += len(chunk)
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        if self.file is None:
+            self.file = open(self.path, 'wb')
+        start = time.perf_counter()
+        self.file.write(chunk)
+        self.timings['write'] += time.perf_counter() - start
+        self.track(chunk)
+
+    def close(self):
+        if self.file is None:
+            open(self.path, 'wb').close()
+        else:
+            self.file.close()
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+
+    @property
+    def payload(self):
+        """True if the body is a ZIP for zip_handler rather than a file to keep"""
+        return self.extract_zips and self.size > 0 and (
+                'application/zip' in self.content_type or self.head[:4] == b'PK\x03\x04')
+
+    @property
+    def checksum(self):
+        return self.digest.hexdigest()
+
+    @property
+    def media(self):
+        """What the body is (type, extension, dimensions or duration), from its first bytes"""
+        return sniff(self.head, self.content_type)
+
 
 class Downloader:
-    def __init__(self, output_dir, max_workers, organization_mode='by_date', filename_format='1'):
+    def __init__(self, output_dir, max_workers, organization_mode='by_date', filename_format='1', manifest=None,
+                 index=None, metrics=None):
         self.output_dir = output_dir
+        self.manifest = manifest or Manifest(output_dir)
+        self.index = index or OutputIndex(output_dir)
+        self.metrics = metrics or Metrics()
+        self.failures = FailureLog(output_dir)
+        # Expired links need a fresh export rather than another attempt, so they get a list of their own
+        self.expired = FailureLog(output_dir, EXPIRED_FILENAME)
         self.max_workers = max_workers
         self.organization_mode = organization_mode
         self.filename_format = filename_format
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
+        self.limiters = HostLimiters(max_workers)
+        # Called with (final path, memory) for every file on disk, e.g. to feed the ZIP stage
+        self.on_file_ready = None
+        # When set, ZIPs are never saved: zip_handler(part path, target_dir, memory, on_done)
+        # queues their extraction and calls on_done(main output path, or False) once done
+        self.zip_handler = None
+        self.session = self.create_session(max_workers)
 
-    def download_single(self, memory):
+    @staticmethod
+    def create_session(max_workers):
+        session = requests.Session()
+        session.headers.update({'User-Agent': USER_AGENT})
+
+        # The default adapter keeps only 10 connections per host, fewer than our workers
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def part_path(self, memory, target_dir, date_formatted):
+        """Stable location of a memory's partial download, so retries and later runs can continue it"""
+        self.index.ensure_dir(target_dir)
+        # Named after the media ID, so a newer export's link continues it too
+        key = hashlib.sha1(media_id(memory.url).encode()).hexdigest()[:12]
+        return os.path.join(target_dir, f".{date_formatted}_{key}{PART_SUFFIX}")
+
+    def resume_headers(self, memory, part_path):
+        """Return (offset, headers) continuing part_path, or (0, {}) if it must start over"""
+        partial = (self.manifest.get(memory.url) or {}).get('partial')
+        if not partial or partial['path'] != os.path.relpath(part_path, self.output_dir):
+            return 0, {}
         try:
-            url = memory.url
-            date_str = memory.date
+            offset = os.path.getsize(part_path)
+        except OSError:
+            return 0, {}
+        if not 0 < offset <= partial['size']:
+            return 0, {}
+
+        headers = {'Range': f"bytes={offset}-"}
+        if partial.get('validator'):
+            # The server answers 200 with the whole body if the file changed since
+            headers['If-Range'] = partial['validator']
+        return offset, headers
+
+    def open_sink(self, memory, part_path, status, headers, offset):
+        """Return (sink, expected_size, complete) for a response, appending to part_path on a 206"""
+        content_range = parse_content_range(headers.get('Content-Range'))
+        extract_zips = self.zip_handler is not None
+        content_type = headers.get('Content-Type', '')
+
+        if status == 416:
+            if offset and content_range and content_range[1] == offset:
+                # The part file already holds the whole body
+                return DownloadSink(part_path, content_type, extract_zips, offset), offset, True
+            # The part file no longer matches the remote one: the next attempt starts over
+            self.remove_part(part_path)
+        if status == 206 and not (content_range and content_range[0] == offset):
+            # A range the part file does not end at: the next attempt starts over without one
+            self.remove_part(part_path)
+            raise IncompleteDownload(f"range response does not continue the {offset} bytes already received")
+        if status == 206:
+            expected = content_range[1]
+        else:
+            offset = 0
+            length = headers.get('Content-Length', '')
+            expected = int(length) if length.isdigit() else None
 
+        if expected and status in (200, 206):
+            validator = headers.get('ETag') or headers.get('Last-Modified')
+            self.manifest.record(memory.url, 'partial', partial={
+                'path': os.path.relpath(part_path, self.output_dir), 'size': expected, 'validator': validator})
+        return DownloadSink(part_path, content_type, extract_zips, offset), expected, False
+
+    @staticmethod
+    def check_complete(sink, expected):
+        if expected and sink.size != expected:
+            raise IncompleteDownload(f"received {sink.size} of {expected} bytes")
+
+    def stream_to_file(self, memory, part_path):
+        """Write the response body to part_path chunk by chunk, resuming it if possible; returns (media, sink)"""
+        offset, headers = self.resume_headers(memory, part_path)
+        limiter = self.limiters.for_url(memory.url)
+        limiter.acquire()
+        try:
+            start = time.monotonic()
+            with self.session.get(memory.url, headers=headers, timeout=TIMEOUT, stream=True) as response:
+                latency = time.monotonic() - start
+                if response.status_code in PERMANENT_STATUSES:
+                    raise PermanentFailure(response.status_code)
+                if is_congestion_status(response.status_code):
+                    limiter.on_congestion(parse_retry_after(response.headers.get('Retry-After')))
+                sink, expected, complete = self.open_sink(memory, part_path, response.status_code,
+                                                          response.headers, offset)
+                # requests cannot tell DNS and connect apart: elapsed runs from sending to the headers
+                sink.timings['ttfb'] = response.elapsed.total_seconds()
+                if not complete:
+                    response.raise_for_status()
+                    transfer_start = time.perf_counter()
+                    try:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            sink.write(chunk)
+                    except BaseException:
+                        sink.discard()
+                        raise
+                    sink.timings['transfer'] = time.perf_counter() - transfer_start - sink.timings['write']
+                sink.close()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            limiter.on_congestion()
+            raise
+        finally:
+            limiter.release()
+
+        limiter.on_success(latency, sink.size - sink.offset)
+        self.check_complete(sink, expected)
+        return sink.media, sink
+
+    def resolve_target(self, memory):
+        """Return (target_dir, date_formatted) for a memory"""
+        if memory.stem is None:
+            memory.prepare(self.organization_mode, self.filename_format)
+
+        target_dir = os.path.join(self.output_dir, memory.folder) if memory.folder else self.output_dir
+        return target_dir, memory.stem
+
+    def find_existing(self, memory, target_dir, date_formatted):
+        """Return a 'skipped' result if the memory is already on disk, None otherwise"""
+        url = memory.url
+        completed_path = self.manifest.completed_path(url, self.index)
+        if completed_path:
+            if self.on_file_ready and completed_path.endswith('.zip'):
+                # Downloaded by an earlier run that stopped before processing it
+                self.on_file_ready(completed_path, memory)
+            return {'status': 'skipped', 'filename': os.path.basename(completed_path),
+                    'size': self.manifest.get(url).get('size', 0)}
+
+        # Archives downloaded before the manifest existed are matched by filename prefix
+        if self.manifest.is_new and self.manifest.get(url) is None:
+            existing_file = self.index.find_prefix(target_dir, date_formatted, preexisting_only=True)
+            if existing_file:
+                file_size = os.path.getsize(os.path.join(target_dir, existing_file))
+                if file_size > 0:
+                    self.manifest.record(url, 'success', path=os.path.join(target_dir, existing_file),
+                                         size=file_size, processed=True)
+                    return {'status': 'skipped', 'filename': existing_file, 'size': file_size}
+        return None
+
+    def find_duplicate(self, checksum):
+        """Return the path of a file already stored with this content, or None"""
+        if DEDUP_MODE == 'off' or not checksum:
+            return None
+        duplicate = self.manifest.path_for_checksum(checksum)
+        # An unprocessed ZIP may still be extracted and removed, so only media files are reused
+        if duplicate and not duplicate.endswith('.zip') and self.index.exists(duplicate):
+            return duplicate
+        return None
+
+    def store_duplicate(self, memory, duplicate, target_dir, date_formatted, size, checksum):
+        """Hardlink (or, in 'skip' mode, just point the manifest at) content stored earlier"""
+        filepath = duplicate
+        if DEDUP_MODE == 'link':
+            extension = os.path.splitext(duplicate)[1].lstrip('.')
+            filename = self.index.allocate(target_dir, date_formatted, extension)
+            filepath = os.path.join(target_dir, filename)
             try:
-                date_obj = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S UTC")
-                if self.organization_mode == 'by_date':
-                    date_folder = date_obj.strftime("%Y/%m")
-                else:
-                    date_folder = ""
-            except:
-                date_folder = "unknown_date" if self.organization_mode == 'by_date' else ""
-                date_obj = None
-
-            target_dir = os.path.join(self.output_dir, date_folder) if date_folder else self.output_dir
-            date_formatted = format_filename_date(date_str, self.filename_format)
-
-            if os.path.exists(target_dir):
-                existing_files = [f for f in os.listdir(target_dir) if f.startswith(date_formatted)]
-                if existing_files:
-                    existing_file = existing_files[0]
-                    file_size = os.path.getsize(os.path.join(target_dir, existing_file))
-                    if file_size > 0:
-                        return {'status': 'skipped', 'filename': existing_file, 'size': file_size}
-
-            last_error = None
+                os.link(duplicate, filepath)
+            except OSError:
+                # Cross-device or unsupported: keep the earlier copy as the only one
+                self.index.remove(filepath)
+                filepath = duplicate
+
+        self.manifest.record(memory.url, 'success', path=filepath, size=size, checksum=checksum,
+                             duplicate_of=os.path.relpath(duplicate, self.output_dir))
+        return {'status': 'success', 'filename': os.path.basename(filepath), 'size': size, 'duplicate': True}
+
+    def finalize(self, memory, part_path, target_dir, date_formatted, media, sink):
+        """Promote a complete part file to its final name (or hand a ZIP payload over) and record it"""
+        size, checksum = sink.size, sink.checksum
+        # A ZIP's checksum ends up on its extracted media, which is not a copy of the ZIP:
+        # a duplicate ZIP gets its own _original/_composed outputs instead
+        duplicate = None if media.kind == 'zip' or sink.payload else self.find_duplicate(checksum)
+        if duplicate:
+            self.remove_part(part_path)
+            # Hardlinks share one inode, so the earlier file's date is kept
+            return self.store_duplicate(memory, duplicate, target_dir, date_formatted, size, checksum)
+
+        if sink.payload:
+            return self.finalize_zip(memory, part_path, target_dir, sink)
+
+        start = time.perf_counter()
+        filename = self.index.allocate(target_dir, date_formatted, media.extension)
+        filepath = os.path.join(target_dir, filename)
+        os.replace(part_path, filepath)
+
+        if memory.timestamp is not None:
+            os.utime(filepath, (memory.timestamp, memory.timestamp))
+        sink.timings['write'] += time.perf_counter() - start
+
+        self.manifest.record(memory.url, 'success', path=filepath, size=size, checksum=checksum,
+                             media=media.to_dict())
+        if self.on_file_ready:
+            self.on_file_ready(filepath, memory)
+        return {'status': 'success', 'filename': filename, 'size': size}
+
+    @staticmethod
+    def remove_part(part_path):
+        if os.path.exists(part_path):
+            os.remove(part_path)
+
+    def finalize_zip(self, memory, part_path, target_dir, sink):
+        """Hand a ZIP part file to zip_handler; the manifest records it once its media is extracted"""
+        media = sink.media.to_dict()
+
+        def on_done(output_path):
+            # The workers read the ZIP from its part file, so it goes only now
+            self.remove_part(part_path)
+            if output_path:
+                self.manifest.record(memory.url, 'success', path=output_path, size=os.path.getsize(output_path),
+                                     checksum=sink.checksum, processed=True, media=media)
+            else:
+                # Nothing was saved: the next run, or --retry-failed, downloads it again
+                self.manifest.record(memory.url, 'error', error="could not extract ZIP")
+                self.failures.record(memory, 'error', "could not extract ZIP")
+
+        try:
+            self.zip_handler(part_path, target_dir, memory, on_done)
+        except BaseException:
+            self.remove_part(part_path)
+            raise
+        return {'status': 'success', 'filename': f"{memory.stem}.zip", 'size': sink.size}
+
+    @staticmethod
+    def with_timings(result, sink, attempt, start):
+        result['timings'] = dict(sink.timings, retries=attempt, total=time.perf_counter() - start)
+        return result
+
+    def download_single(self, memory):
+        try:
+            start = time.perf_counter()
+            target_dir, date_formatted = self.resolve_target(memory)
+
+            existing = self.find_existing(memory, target_dir, date_formatted)
+            if existing:
+                return existing
+
+            # Each attempt continues where the previous one stopped
+            part_path = self.part_path(memory, target_dir, date_formatted)
             for attempt in range(MAX_RETRIES):
                 try:
-                    response = self.session.get(url, timeout=TIMEOUT)
-                    response.raise_for_status()
-                    content = response.content
-                    content_type = response.headers.get('Content-Type', '')
+                    media, sink = self.stream_to_file(memory, part_path)
                     break
-                except requests.exceptions.RequestException as e:
-                    last_error = e
+                except PermanentFailure:
+                    raise
+                except requests.exceptions.RequestException:
                     if attempt < MAX_RETRIES - 1:
-                        time.sleep(RETRY_DELAY * (2 ** attempt))
+                        time.sleep(retry_delay(attempt))
                     else:
                         raise
 
-            if 'image/jpeg' in content_type:
-                extension = 'jpg'
-            elif 'image/png' in content_type:
-                extension = 'png'
-            elif 'image/gif' in content_type:
-                extension = 'gif'
-            elif 'video/mp4' in content_type or 'video/quicktime' in content_type:
-                extension = 'mp4'
-            elif 'application/zip' in content_type:
-                extension = 'zip'
-            else:
-                if content[:4] == b'\xff\xd8\xff\xe0' or content[:4] == b'\xff\xd8\xff\xe1':
-                    extension = 'jpg'
-                elif content[:8] == b'\x89PNG\r\n\x1a\n':
-                    extension = 'png'
-                elif content[:4] == b'GIF8':
-                    extension = 'gif'
-                elif b'ftyp' in content[:20]:
-                    extension = 'mp4'
-                else:
-                    extension = 'dat'
-
-            Path(target_dir).mkdir(parents=True, exist_ok=True)
-            filename = f"{date_formatted}.{extension}"
-            filepath = os.path.join(target_dir, filename)
+            result = self.finalize(memory, part_path, target_dir, date_formatted, media, sink)
+            return self.with_timings(result, sink, attempt, start)
 
-            counter = 1
-            while os.path.exists(filepath):
-                filename = f"{date_formatted}_{counter}.{extension}"
-                filepath = os.path.join(target_dir, filename)
-                counter += 1
+        except PermanentFailure as e:
+            self.manifest.record(memory.url, 'expired', error=str(e))
+            return {'status': 'expired', 'url': memory.url, 'error': str(e), 'cause': failure_cause(e)}
+        except requests.exceptions.RequestException as e:
+            self.manifest.record(memory.url, 'failed', error=str(e))
+            return {'status': 'failed', 'url': memory.url, 'error': str(e), 'cause': failure_cause(e)}
+        except Exception as e:
+            self.manifest.record(memory.url, 'error', error=str(e))
+            return {'status': 'error', 'url': memory.url, 'error': str(e), 'cause': failure_cause(e)}
 
-            with open(filepath, 'wb') as f:
-                f.write(content)
+    def start_run(self, memories):
+        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
 
-            if date_obj:
-                timestamp_seconds = date_obj.timestamp()
-                os.utime(filepath, (timestamp_seconds, timestamp_seconds))
+        # Memories may also be a generator (e.g. HTMLParser.iter_memories), whose size is unknown
+        self.total = len(memories) if hasattr(memories, '__len__') else None
+        self.success_count = 0
+        self.skipped_count = 0
+        self.failed_count = 0
+        self.expired_count = 0
+        self.failure_causes = {}
+        self.duplicate_count = 0
+        self.saved_bytes = 0
+        self.total_size = 0
+        self.failed_items = []
+        self.failures.start()
+        self.expired.start()
+        self.start_time = time.time()
 
-            return {'status': 'success', 'filename': filename, 'size': len(content)}
+    def progress_bar(self):
+        return tqdm(total=self.total, desc="📥 Download", unit="memory",
+                    bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
+                    colour="green", position=0)
 
-        except requests.exceptions.RequestException as e:
-            return {'status': 'failed', 'url': url, 'error': str(e)}
-        except Exception as e:
-            return {'status': 'error', 'url': url, 'error': str(e)}
+    def record_result(self, memory, result, pbar):
+        if result['status'] == 'success':
+            self.success_count += 1
+            self.total_size += result['size']
+            if result.get('duplicate'):
+                self.duplicate_count += 1
+                self.saved_bytes += result['size']
+        elif result['status'] == 'skipped':
+            self.skipped_count += 1
+        else:
+            self.failed_count += 1
+            error = result.get('error', 'Unknown error')
+            cause = result.get('cause', result['status'])
+            self.failure_causes[cause] = self.failure_causes.get(cause, 0) + 1
+            if result['status'] == 'expired':
+                self.expired_count += 1
+                self.expired.record(memory, result['status'], error)
+            else:
+                self.failures.record(memory, result['status'], error)
+            if len(self.failed_items) < FAILURES_SHOWN:
+                self.failed_items.append({'url': memory.url, 'date': memory.date, 'error': error})
+
+        self.metrics.record(memory, result)
+        pbar.set_postfix_str(self.status_line())
+        pbar.update(1)
+
+    def status_line(self):
+        return (f"✓ {self.success_count} | ⊘ {self.skipped_count} | ✗ {self.failed_count}"
+                f" | ⚡ {self.limiters.total_limit()} | {format_size(self.limiters.throughput())}/s")
+
+    def run_jobs(self, jobs, pbar):
+        """Download (downloader, memory) pairs with this engine's workers; each result goes to its own downloader"""
+        # Sliding window: submitting everything up front would hold a future per memory
+        window = self.max_workers * JOBS_PER_WORKER
+        jobs = iter(jobs)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_to_job = {}
+            while True:
+                for downloader, memory in jobs:
+                    future_to_job[executor.submit(downloader.download_single, memory)] = (downloader, memory)
+                    if len(future_to_job) >= window:
+                        break
+                if not future_to_job:
+                    return
+
+                done, _ = wait(future_to_job, return_when=FIRST_COMPLETED)
+                for future in done:
+                    downloader, memory = future_to_job.pop(future)
+                    downloader.record_result(memory, future.result(), pbar)
 
     def download_all(self, memories):
-        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        self.start_run(memories)
 
-        total = len(memories)
-        success_count = 0
-        skipped_count = 0
-        failed_count = 0
-        total_size = 0
-        failed_items = []
-
-        print_color(f"\n🚀 Starting download of {total} memories with {self.max_workers} threads...\n", Colors.BOLD)
-
-        start_time = time.time()
-
-        with tqdm(total=total, desc="📥 Download", unit="memory",
-                  bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
-                  colour="green") as pbar:
-
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_memory = {
-                    executor.submit(self.download_single, memory): memory
-                    for memory in memories
-                }
-
-                for future in as_completed(future_to_memory):
-                    memory = future_to_memory[future]
-                    result = future.result()
-
-                    if result['status'] == 'success':
-                        success_count += 1
-                        total_size += result['size']
-                        pbar.set_postfix_str(f"✓ {success_count} | ⊘ {skipped_count} | ✗ {failed_count}")
-                    elif result['status'] == 'skipped':
-                        skipped_count += 1
-                        pbar.set_postfix_str(f"✓ {success_count} | ⊘ {skipped_count} | ✗ {failed_count}")
-                    else:
-                        failed_count += 1
-                        failed_items.append({
-                            'url': memory.url,
-                            'date': memory.date,
-                            'error': result.get('error', 'Unknown error')
-                        })
-                        pbar.set_postfix_str(f"✓ {success_count} | ⊘ {skipped_count} | ✗ {failed_count}")
+        print_color(f"\n🚀 Starting download of {self.total or 'all'} memories with up to {self.max_workers} threads...\n", Colors.BOLD)
 
-                    pbar.update(1)
+        with self.progress_bar() as pbar:
+            self.run_jobs(((self, memory) for memory in memories), pbar)
 
         self.session.close()
-        elapsed_time = time.time() - start_time
+        self.print_summary()
+
+    def print_summary(self):
+        self.manifest.close()
+        self.failures.close()
+        self.expired.close()
+        if self.total is None:
+            self.total = self.success_count + self.skipped_count + self.failed_count
+        elapsed_time = time.time() - self.start_time
 
         print_color("\n" + "="*80, Colors.BLUE)
         print_color("📊 DOWNLOAD SUMMARY", Colors.BOLD)
         print_color("="*80, Colors.BLUE)
-        print_color(f"✓ Successfully downloaded: {success_count}", Colors.GREEN)
-        print_color(f"⊘ Already existing (skipped): {skipped_count}", Colors.YELLOW)
-        print_color(f"✗ Failed: {failed_count}", Colors.RED)
-        print_color(f"📁 Total size downloaded: {format_size(total_size)}", Colors.CYAN)
+        print_color(f"✓ Successfully downloaded: {self.success_count}", Colors.GREEN)
+        print_color(f"⊘ Already existing (skipped): {self.skipped_count}", Colors.YELLOW)
+        print_color(f"✗ Failed: {self.failed_count}", Colors.RED)
+        if self.failure_causes:
+            print_color("   " + ", ".join(f"{cause}: {count}" for cause, count in
+                                         sorted(self.failure_causes.items(), key=lambda item: -item[1])), Colors.RED)
+        print_color(f"📁 Total size downloaded: {format_size(self.total_size)}", Colors.CYAN)
+        if self.duplicate_count:
+            print_color(f"♻️  Duplicates: {self.duplicate_count} ({format_size(self.saved_bytes)} not stored again)", Colors.CYAN)
         print_color(f"⏱️  Elapsed time: {elapsed_time:.2f} seconds", Colors.CYAN)
 
         if elapsed_time > 0:
-            speed = success_count / elapsed_time
-            print_color(f"🚀 Average speed: {speed:.2f} memories/second", Colors.CYAN)
+            # Skips count too: they are memories handled, and they took part of the elapsed time
+            speed = (self.success_count + self.skipped_count + self.failed_count) / elapsed_time
+            print_color(f"🚀 Average speed: {speed:.2f} memories/second, "
+                        f"{format_size(self.total_size / elapsed_time)}/s", Colors.CYAN)
 
         print_color(f"📂 Output folder: {os.path.abspath(self.output_dir)}", Colors.BLUE)
         print_color("="*80 + "\n", Colors.BLUE)
 
-        if failed_items and len(failed_items) <= 10:
+        if self.failed_items:
             print_color("⚠️  Failed memories:", Colors.YELLOW)
-            for item in failed_items:
+            for item in self.failed_items:
                 print(f"  • {item['date']} - {item['url'][:60]}...")
                 print(f"    Error: {item['error']}")
+            if self.failed_count > len(self.failed_items):
+                print(f"  ... and {self.failed_count - len(self.failed_items)} more")
+            if self.failed_count > self.expired_count:
+                print_color(f"📝 All failures are listed in {self.failures.path}, "
+                            f"retry them with --retry-failed", Colors.YELLOW)
+        if self.expired_count:
+            print_color(f"🔗 {self.expired_count} links expired or were refused (listed in {self.expired.path}): "
+                        f"request a new export, then run --retry-failed --html-file <new export>", Colors.YELLOW)
 
-        if success_count > 0:
+        if self.success_count > 0:
             print_color("🎉 Download completed successfully!", Colors.GREEN)
-        elif skipped_count == total:
+        elif self.skipped_count == self.total:
             print_color("ℹ️  All memories were already downloaded", Colors.YELLOW)
         else:
             print_color("⚠️  Download completed with errors", Colors.YELLOW)
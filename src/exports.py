@@ -0,0 +1,40 @@
+import os
+
+EXPORT_FILENAME = "memories_history.html"
+
+
+def export_name(html_file):
+    """Folder name for an export: its directory for memories_history.html files, else the file name"""
+    directory, filename = os.path.split(os.path.abspath(html_file))
+    if filename != EXPORT_FILENAME:
+        return os.path.splitext(filename)[0]
+    # Snapchat exports keep the file in an html/ subfolder
+    if os.path.basename(directory) == 'html':
+        directory = os.path.dirname(directory)
+    return os.path.basename(directory)
+
+
+def find_exports(paths):
+    """Return (name, html_file) for every export in the given HTML files and directories"""
+    html_files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            html_files.append(path)
+            continue
+
+        # Extracted exports anywhere below, plus HTML files (e.g. renamed exports) directly inside
+        found = {os.path.join(root, EXPORT_FILENAME)
+                 for root, dirs, files in os.walk(path) if EXPORT_FILENAME in files}
+        found.update(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.html'))
+        html_files.extend(sorted(found))
+
+    exports, names = [], set()
+    for html_file in html_files:
+        name = base = export_name(html_file)
+        counter = 2
+        while name in names:
+            name = f"{base}_{counter}"
+            counter += 1
+        names.add(name)
+        exports.append((name, html_file))
+    return exports
@@ -0,0 +1,74 @@
+import os
+import json
+import time
+import threading
+from .models import Memory
+
+# Memories whose links expired: they need the links of a newer export
+EXPIRED_FILENAME = "expired.jsonl"
+
+
+class FailureLog:
+    """failed.jsonl: the memories that failed in the last run of an output folder.
+
+    Failures are appended as they happen, so a run of any size keeps none
+    of them in memory and an interrupted run still leaves its list. Each
+    line holds the whole memory, so --retry-failed can redo them without
+    parsing the HTML file again.
+    """
+
+    FILENAME = "failed.jsonl"
+
+    def __init__(self, output_dir, filename=FILENAME):
+        self.path = os.path.join(output_dir, filename)
+        self.lock = threading.Lock()
+        self.file = None
+        self.count = 0
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self, organization_mode='by_date', filename_format='1'):
+        """Return the memories listed in the file, ready to download again"""
+        memories, seen = [], set()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    memory = Memory(entry['url'], entry['date'], entry['type'],
+                                    entry.get('latitude'), entry.get('longitude'))
+                except (ValueError, KeyError):
+                    continue
+                if memory.url not in seen:
+                    seen.add(memory.url)
+                    memories.append(memory.prepare(organization_mode, filename_format))
+        return memories
+
+    def start(self):
+        """Forget the previous run's failures; call once its list has been loaded"""
+        with self.lock:
+            self.close_file()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.count = 0
+
+    def record(self, memory, status, error):
+        entry = {'url': memory.url, 'date': memory.date, 'type': memory.type,
+                 'latitude': memory.latitude, 'longitude': memory.longitude,
+                 'status': status, 'error': error, 'time': int(time.time())}
+        with self.lock:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(json.dumps(entry) + "\n")
+            self.file.flush()
+            self.count += 1
+
+    def close_file(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def close(self):
+        with self.lock:
+            self.close_file()
@@ -0,0 +1,97 @@
+import math
+import hashlib
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from PIL import Image
+
+OVERLAY_CACHE_SIZE = 32
+
+_overlay_cache = OrderedDict()
+_overlay_cache_lock = threading.Lock()
+
+
+def open_overlay(overlay_data):
+    overlay_img = Image.open(BytesIO(overlay_data))
+    if overlay_img.mode != 'RGBA':
+        overlay_img = overlay_img.convert('RGBA')
+    return overlay_img
+
+
+def overlay_is_empty(overlay_data):
+    """True if the overlay PNG has no visible pixel"""
+    return open_overlay(overlay_data).getchannel('A').getbbox() is None
+
+
+def scaled_overlay(overlay_data, size):
+    """Return (patch, offset): the visible part of the overlay, resized for a base image of this size.
+
+    Only the alpha bounding box is resized, and results are cached by
+    overlay content and size, so repeated overlays cost nothing. Returns
+    (None, None) for a fully transparent overlay.
+    """
+    key = (hashlib.blake2b(overlay_data, digest_size=16).digest(), size)
+    with _overlay_cache_lock:
+        if key in _overlay_cache:
+            _overlay_cache.move_to_end(key)
+            return _overlay_cache[key]
+
+    overlay_img = open_overlay(overlay_data)
+    bbox = overlay_img.getchannel('A').getbbox()
+
+    if bbox is None:
+        result = (None, None)
+    else:
+        scale_x = size[0] / overlay_img.width
+        scale_y = size[1] / overlay_img.height
+        # Grow the box to whole target pixels so resampling stays aligned with a full resize
+        left = max(0, math.floor(bbox[0] * scale_x) - 1)
+        top = max(0, math.floor(bbox[1] * scale_y) - 1)
+        right = min(size[0], math.ceil(bbox[2] * scale_x) + 1)
+        bottom = min(size[1], math.ceil(bbox[3] * scale_y) + 1)
+
+        if overlay_img.size == size:
+            patch = overlay_img.crop((left, top, right, bottom))
+        else:
+            patch = overlay_img.resize(
+                (right - left, bottom - top), Image.Resampling.LANCZOS,
+                box=(left / scale_x, top / scale_y, right / scale_x, bottom / scale_y))
+        result = (patch, (left, top))
+
+    with _overlay_cache_lock:
+        _overlay_cache[key] = result
+        if len(_overlay_cache) > OVERLAY_CACHE_SIZE:
+            _overlay_cache.popitem(last=False)
+    return result
+
+
+def compose_image(media_data, overlay_data, output_path):
+    """Composite an overlay onto an image, touching only the overlay's visible region.
+
+    An empty overlay writes the original bytes untouched (no decode, no
+    re-encode).
+    """
+    try:
+        base_img = Image.open(BytesIO(media_data))
+        patch, offset = scaled_overlay(overlay_data, base_img.size)
+
+        if patch is None:
+            with open(output_path, 'wb') as f:
+                f.write(media_data)
+            return True
+
+        if base_img.mode == 'RGBA':
+            base_img.alpha_composite(patch, dest=offset)
+        else:
+            if base_img.mode != 'RGB':
+                base_img = base_img.convert('RGB')
+            # For an opaque base, pasting with the overlay as mask is the same blend as alpha_composite
+            base_img.paste(patch, offset, patch)
+
+        if output_path.lower().endswith('.jpg') and base_img.mode != 'RGB':
+            base_img = base_img.convert('RGB')
+
+        base_img.save(output_path, quality=95)
+        return True
+    except Exception:
+        return False
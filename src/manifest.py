@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import threading
+from .sync import media_id
+
+
+class Manifest:
+    """Append-only JSONL record of every memory handled in an output folder.
+
+    Each line stores the latest known state of one memory, keyed by its
+    media ID: download links are signed again in every export, so a newer
+    export still finds what an earlier one stored. Methods take the link
+    itself. On load, later lines win, so the file never needs rewriting
+    while a run is in progress.
+    """
+
+    FILENAME = ".manifest.jsonl"
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self.entries = {}
+        self.by_path = {}
+        self.by_checksum = {}
+        self.lock = threading.Lock()
+        self.file = None
+        self.load()
+        self.is_new = not self.entries
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._index(entry)
+
+    def _index(self, entry):
+        # Manifests written before media IDs were used are keyed by the link
+        entry['id'] = media_id(entry['id'])
+        previous = self.entries.get(entry['id'])
+        if previous and previous.get('path'):
+            self.by_path.pop(previous['path'], None)
+        self.entries[entry['id']] = entry
+        if entry.get('path'):
+            self.by_path[entry['path']] = entry['id']
+            checksum = entry.get('checksum')
+            if checksum and entry['status'] == 'success':
+                owner = self.by_checksum.get(checksum)
+                # Follow the owner when its file moves (e.g. a ZIP replaced by its media)
+                if owner is None or (previous and owner == previous.get('path')):
+                    self.by_checksum[checksum] = entry['path']
+
+    def get(self, url):
+        return self.entries.get(media_id(url))
+
+    def completed_path(self, url, index=None):
+        """Return the absolute path of a completed memory, or None if it must be (re)downloaded.
+
+        With an OutputIndex, existence is checked in memory: files only get
+        their final name once complete, so no stat is needed.
+        """
+        entry = self.entries.get(media_id(url))
+        if not entry or entry['status'] != 'success' or not entry.get('path'):
+            return None
+
+        filepath = os.path.join(self.output_dir, entry['path'])
+        if index is not None:
+            return filepath if index.exists(filepath) else None
+
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            return None
+
+        if size == 0 or (entry.get('size') and not entry.get('processed') and size != entry['size']):
+            return None
+        return filepath
+
+    def path_for_checksum(self, checksum):
+        """Return the absolute path already stored for this content, or None"""
+        with self.lock:
+            path = self.by_checksum.get(checksum)
+        return os.path.join(self.output_dir, path) if path else None
+
+    def media_for_path(self, path):
+        """Return what was sniffed from the file at this path when it was downloaded, or {}"""
+        with self.lock:
+            memory_id = self.by_path.get(os.path.relpath(path, self.output_dir))
+            entry = self.entries.get(memory_id) if memory_id else None
+        return (entry or {}).get('media') or {}
+
+    def owns_path(self, path):
+        """True if an entry still points at this file (e.g. a ZIP not processed yet)"""
+        with self.lock:
+            return os.path.relpath(path, self.output_dir) in self.by_path
+
+    def failed_ids(self):
+        """Media IDs of the memories whose last attempt failed"""
+        return {memory_id for memory_id, entry in self.entries.items()
+                if entry['status'] not in ('success', 'skipped')}
+
+    def record(self, url, status, path=None, size=None, checksum=None, error=None, **extra):
+        memory_id = media_id(url)
+        entry = {'id': memory_id, 'status': status, 'time': int(time.time())}
+        if path is not None:
+            entry['path'] = os.path.relpath(path, self.output_dir)
+        if size is not None:
+            entry['size'] = size
+        if checksum is not None:
+            entry['checksum'] = checksum
+        if error is not None:
+            entry['error'] = error
+        entry.update(extra)
+
+        with self.lock:
+            previous = self.entries.get(memory_id)
+            if status != 'success' and 'partial' not in entry and previous and previous.get('partial'):
+                # A failed attempt keeps what is needed to resume its part file
+                entry['partial'] = previous['partial']
+            self._append(entry)
+
+    def update(self, url, **changes):
+        """Record an entry again with some fields changed (e.g. its size once metadata is embedded)"""
+        with self.lock:
+            entry = dict(self.entries[media_id(url)], time=int(time.time()))
+            entry.update(changes)
+            self._append(entry)
+
+    def _append(self, entry):
+        self._index(entry)
+        if self.file is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def replace_path(self, old_path, new_path, **extra):
+        """Point the entry that owned old_path to new_path (e.g. a ZIP replaced by its extracted media)"""
+        with self.lock:
+            memory_id = self.by_path.get(os.path.relpath(old_path, self.output_dir))
+            entry = self.entries.get(memory_id) if memory_id else None
+        if entry is None or not os.path.exists(new_path):
+            return
+        self.record(memory_id, entry['status'], path=new_path, size=os.path.getsize(new_path),
+                    checksum=entry.get('checksum'), processed=True, **extra)
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
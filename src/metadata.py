@@ -0,0 +1,233 @@
+import os
+import shutil
+import subprocess
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+from .utils import print_color, Colors
+from .metrics import Metrics, timed
+from .config import METADATA_WORKERS, JOBS_PER_WORKER
+
+# EXIF tags (IFD0, Exif IFD and GPS IFD)
+DATETIME = 0x0132
+DATETIME_ORIGINAL = 0x9003
+DATETIME_DIGITIZED = 0x9004
+OFFSET_TIME_ORIGINAL = 0x9011
+GPS_VERSION, GPS_LATITUDE_REF, GPS_LATITUDE, GPS_LONGITUDE_REF, GPS_LONGITUDE = 0, 1, 2, 3, 4
+
+JPEG_EXTENSIONS = ('.jpg', '.jpeg')
+VIDEO_EXTENSIONS = ('.mp4', '.mov')
+# Files a processed ZIP may leave next to the one recorded in the manifest
+ZIP_OUTPUT_SUFFIXES = ('', '_original', '_composed')
+
+
+def exif_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y:%m:%d %H:%M:%S")
+
+
+def gps_coordinate(value):
+    """Degrees, minutes, seconds of a decimal coordinate, as EXIF stores them"""
+    value = abs(value)
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    return float(degrees), float(minutes), round((value - degrees - minutes / 60) * 3600, 4)
+
+
+def build_exif(existing, timestamp, latitude, longitude):
+    """APP1 payload with the capture time and position, keeping the tags of an existing one"""
+    from PIL import Image, ExifTags
+
+    exif = Image.Exif()
+    if existing:
+        exif.load(existing)
+    if timestamp is not None:
+        exif[DATETIME] = exif_datetime(timestamp)
+        exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+        exif_ifd[DATETIME_ORIGINAL] = exif_ifd[DATETIME_DIGITIZED] = exif_datetime(timestamp)
+        # Snapchat dates are UTC
+        exif_ifd[OFFSET_TIME_ORIGINAL] = "+00:00"
+    if latitude is not None and longitude is not None:
+        gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+        gps[GPS_VERSION] = b'\x02\x02\x00\x00'
+        gps[GPS_LATITUDE_REF] = 'N' if latitude >= 0 else 'S'
+        gps[GPS_LATITUDE] = gps_coordinate(latitude)
+        gps[GPS_LONGITUDE_REF] = 'E' if longitude >= 0 else 'W'
+        gps[GPS_LONGITUDE] = gps_coordinate(longitude)
+    return exif.tobytes()
+
+
+def jpeg_with_exif(data, timestamp, latitude, longitude):
+    """Return the JPEG with its EXIF segment added or replaced; the image data is copied untouched"""
+    if data[:2] != b'\xff\xd8':
+        raise ValueError("not a JPEG file")
+
+    insert_at, existing, existing_end = 2, None, None
+    offset = 2
+    while offset + 4 <= len(data) and data[offset] == 0xFF:
+        marker = data[offset + 1]
+        if marker == 0xDA:
+            break
+        end = offset + 2 + int.from_bytes(data[offset + 2:offset + 4], 'big')
+        payload = data[offset + 4:end]
+        if marker == 0xE1 and payload.startswith(b'Exif\x00\x00'):
+            insert_at, existing, existing_end = offset, payload, end
+            break
+        if marker == 0xE0 and offset == 2:
+            # JFIF files must start with their APP0 segment
+            insert_at = end
+        offset = end
+
+    exif = build_exif(existing, timestamp, latitude, longitude)
+    if len(exif) + 2 > 0xFFFF:
+        raise ValueError("EXIF segment too large")
+    segment = b'\xff\xe1' + (len(exif) + 2).to_bytes(2, 'big') + exif
+    return data[:insert_at] + segment + data[existing_end or insert_at:]
+
+
+def iso6709(latitude, longitude):
+    return f"{latitude:+08.4f}{longitude:+09.4f}/"
+
+
+class MetadataWriter:
+    """Embeds each memory's capture time and GPS position into its files.
+
+    JPEGs get an EXIF segment spliced in front of their image data, so no
+    pixel is re-encoded. Videos are remuxed by ffmpeg with `-c copy` to set
+    creation_time and the location atom. Files are handled in parallel
+    batches, and written entries are marked in the manifest, so later runs
+    only handle new memories. Hardlinked files are rewritten in place, so
+    their duplicates get the metadata too.
+    """
+
+    def __init__(self, output_dir, manifest, index=None, metrics=None, workers=METADATA_WORKERS):
+        self.output_dir = output_dir
+        self.manifest = manifest
+        self.index = index
+        self.metrics = metrics or Metrics()
+        self.workers = workers
+        self.ffmpeg = shutil.which('ffmpeg')
+        self.counts = dict.fromkeys(('photo', 'video', 'skipped', 'failed'), 0)
+
+    def targets(self, memory):
+        """Files of a memory still lacking metadata (empty if there is nothing to write)"""
+        entry = self.manifest.get(memory.url)
+        if not entry or entry.get('metadata') or entry.get('duplicate_of'):
+            return []
+        path = self.manifest.completed_path(memory.url, self.index)
+        if path is None:
+            return []
+
+        paths = [path]
+        if entry.get('processed'):
+            # The outputs share the stem of the recorded one, which may carry a _1 suffix
+            directory, filename = os.path.split(path)
+            stem, extension = os.path.splitext(filename)
+            stem = stem[:-len('_original')] if stem.endswith('_original') else stem
+            paths += [candidate for candidate in
+                      (os.path.join(directory, f"{stem}{suffix}{extension}") for suffix in ZIP_OUTPUT_SUFFIXES)
+                      if candidate != path and os.path.exists(candidate)]
+        return paths
+
+    def write_jpeg(self, path, memory):
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.replace(path, jpeg_with_exif(data, memory.timestamp, memory.latitude, memory.longitude))
+
+    def write_video(self, path, memory):
+        directory, filename = os.path.split(path)
+        temp_path = os.path.join(directory, f".{os.path.splitext(filename)[0]}.meta{os.path.splitext(filename)[1]}")
+        cmd = [self.ffmpeg, '-v', 'error', '-y', '-i', path, '-map', '0', '-c', 'copy', '-map_metadata', '0']
+        if memory.timestamp is not None:
+            cmd += ['-metadata', 'creation_time=' +
+                    datetime.fromtimestamp(memory.timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")]
+        if memory.latitude is not None and memory.longitude is not None:
+            cmd += ['-metadata', 'location=' + iso6709(memory.latitude, memory.longitude)]
+        try:
+            subprocess.run(cmd + [temp_path], check=True, capture_output=True)
+            self.install(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def install(temp_path, path):
+        """Move a rewritten file over path; a hardlinked one is overwritten in place, so its links see it too"""
+        if os.stat(path).st_nlink > 1:
+            with open(temp_path, 'rb') as source, open(path, 'r+b') as target:
+                shutil.copyfileobj(source, target)
+                target.truncate()
+        else:
+            os.replace(temp_path, path)
+
+    @classmethod
+    def replace(cls, path, data):
+        temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.meta")
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            cls.install(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def write_memory(self, memory, paths):
+        """Write the metadata of one memory's files; returns 'photo', 'video', 'skipped' or 'failed'"""
+        outcome, failed = 'skipped', False
+        for path in paths:
+            extension = os.path.splitext(path)[1].lower()
+            try:
+                if extension in JPEG_EXTENSIONS:
+                    self.write_jpeg(path, memory)
+                    outcome = 'photo'
+                elif extension in VIDEO_EXTENSIONS and self.ffmpeg:
+                    self.write_video(path, memory)
+                    outcome = 'video'
+                else:
+                    continue
+            except Exception:
+                # The file is left as it was; the next run tries again
+                failed = True
+                continue
+            # Rewriting the file reset its date
+            if memory.timestamp is not None:
+                os.utime(path, (memory.timestamp, memory.timestamp))
+
+        if failed:
+            return 'failed'
+        if outcome != 'skipped':
+            # The manifest checks the size of completed files, so it must follow the rewrite
+            self.manifest.update(memory.url, size=os.path.getsize(paths[0]), metadata=True)
+        return outcome
+
+    def run(self, memory, paths):
+        outcome, seconds = timed(self.write_memory, memory, paths)
+        if outcome in ('photo', 'video'):
+            self.metrics.observe('metadata', seconds, memory.kind)
+        return outcome
+
+    def write_all(self, memories):
+        pending = [(memory, paths) for memory in memories
+                   if (memory.timestamp is not None or memory.latitude is not None)
+                   for paths in [self.targets(memory)] if paths]
+        if not pending:
+            return
+
+        # Batches bound the futures held at once, like the download window
+        batch_size = self.workers * JOBS_PER_WORKER
+        with ThreadPoolExecutor(max_workers=self.workers) as executor, \
+                tqdm(total=len(pending), desc="🏷️  Metadata", unit="file", colour="magenta") as pbar:
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                for outcome in executor.map(lambda job: self.run(*job), batch):
+                    self.counts[outcome] += 1
+                    pbar.update(1)
+        self.print_summary()
+
+    def print_summary(self):
+        print_color(f"🏷️  Metadata written: {self.counts['photo']} photos, {self.counts['video']} videos",
+                    Colors.CYAN)
+        if self.counts['skipped']:
+            reason = "" if self.ffmpeg else " (videos need ffmpeg)"
+            print_color(f"⊘ Metadata not supported: {self.counts['skipped']}{reason}", Colors.YELLOW)
+        if self.counts['failed']:
+            print_color(f"✗ Metadata failed: {self.counts['failed']}", Colors.RED)
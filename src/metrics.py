@@ -0,0 +1,181 @@
+import json
+import time
+import bisect
+import threading
+from .config import METRICS_BUCKETS
+
+# Phases timed for each memory. dns and connect are part of ttfb, and are
+# only known for new connections of the async engine (requests does not
+# expose them, so the threads engine reports ttfb = response.elapsed).
+PHASES = ('dns', 'connect', 'ttfb', 'transfer', 'write', 'compose', 'metadata', 'total')
+BOUNDS = {
+    'network': ('ttfb', 'transfer'),
+    'disk': ('write',),
+    'ffmpeg/Pillow': ('compose', 'metadata'),
+}
+SLOWEST_KEPT = 10
+
+
+def timed(func, *args, **kwargs):
+    """Call func and return (result, seconds); picklable, so it can wrap pool jobs"""
+    start = time.perf_counter()
+    return func(*args, **kwargs), time.perf_counter() - start
+
+
+class Histogram:
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding this fraction of observations"""
+        if not self.count:
+            return None
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= fraction * self.count:
+                return bound
+        return float('inf')
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'p50': self.percentile(0.50),
+            'p99': self.percentile(0.99),
+            'buckets': {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+            'overflow': self.counts[-1],
+        }
+
+
+class Metrics:
+    """Per-memory phase timings, aggregated into histograms by phase and media kind.
+
+    The downloader and the ZIP processor record into one shared instance;
+    at the end of the run it can be exported as JSON or as a Prometheus
+    textfile, and its summary says which stage the run spent its time in.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.statuses = {}
+        self.bytes = 0
+        self.retries = 0
+        self.slowest = []
+        self.start_time = time.time()
+
+    def observe(self, phase, seconds, kind='unknown'):
+        with self.lock:
+            histogram = self.histograms.get((phase, kind))
+            if histogram is None:
+                histogram = self.histograms[(phase, kind)] = Histogram()
+            histogram.observe(seconds)
+
+    def record(self, memory, result):
+        """Account for one finished memory and the timings its download result carries"""
+        timings = result.get('timings', {})
+        kind = memory.kind or 'unknown'
+        for phase, seconds in timings.items():
+            if phase in PHASES:
+                self.observe(phase, seconds, kind)
+
+        with self.lock:
+            self.statuses[result['status']] = self.statuses.get(result['status'], 0) + 1
+            if result['status'] == 'success':
+                self.bytes += result.get('size', 0)
+            self.retries += timings.get('retries', 0)
+            if 'total' in timings:
+                self.slowest.append((timings['total'], memory.date, kind, memory.url))
+                self.slowest.sort(reverse=True)
+                del self.slowest[SLOWEST_KEPT:]
+
+    def phase_totals(self):
+        totals = {}
+        with self.lock:
+            for (phase, _), histogram in self.histograms.items():
+                totals[phase] = totals.get(phase, 0.0) + histogram.sum
+        return totals
+
+    def bound(self):
+        """Name of the stage the run spent the most time in, with each stage's share"""
+        totals = self.phase_totals()
+        stages = {stage: sum(totals.get(phase, 0.0) for phase in phases) for stage, phases in BOUNDS.items()}
+        overall = sum(stages.values())
+        if not overall:
+            return None, {}
+        shares = {stage: seconds / overall for stage, seconds in stages.items()}
+        return max(shares, key=shares.get), shares
+
+    def to_dict(self):
+        bound, shares = self.bound()
+        with self.lock:
+            phases = {}
+            for (phase, kind), histogram in sorted(self.histograms.items()):
+                phases.setdefault(phase, {})[kind] = histogram.to_dict()
+            return {
+                'elapsed': round(time.time() - self.start_time, 3),
+                'memories': dict(self.statuses),
+                'bytes': self.bytes,
+                'retries': self.retries,
+                'phases': phases,
+                'bound': bound,
+                'shares': {stage: round(share, 3) for stage, share in shares.items()},
+                'slowest': [{'seconds': round(seconds, 3), 'date': date, 'kind': kind, 'url': url}
+                            for seconds, date, kind, url in self.slowest],
+            }
+
+    def to_prometheus(self):
+        lines = [
+            "# HELP snapchat_memories_phase_seconds Time spent per memory in each phase",
+            "# TYPE snapchat_memories_phase_seconds histogram",
+        ]
+        with self.lock:
+            for (phase, kind), histogram in sorted(self.histograms.items()):
+                labels = f'phase="{phase}",kind="{kind}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'snapchat_memories_phase_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'snapchat_memories_phase_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'snapchat_memories_phase_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'snapchat_memories_phase_seconds_count{{{labels}}} {histogram.count}')
+
+            lines += ["# HELP snapchat_memories_total Memories handled, by outcome",
+                      "# TYPE snapchat_memories_total counter"]
+            lines += [f'snapchat_memories_total{{status="{status}"}} {count}'
+                      for status, count in sorted(self.statuses.items())]
+            lines += ["# HELP snapchat_memories_bytes_total Bytes downloaded",
+                      "# TYPE snapchat_memories_bytes_total counter",
+                      f"snapchat_memories_bytes_total {self.bytes}",
+                      "# HELP snapchat_memories_retries_total Download attempts retried",
+                      "# TYPE snapchat_memories_retries_total counter",
+                      f"snapchat_memories_retries_total {self.retries}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write the report as a Prometheus textfile (*.prom) or as JSON (anything else)"""
+        content = self.to_prometheus() if path.endswith('.prom') else json.dumps(self.to_dict(), indent=2) + "\n"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def summary_lines(self):
+        totals = self.phase_totals()
+        if not totals:
+            return []
+
+        lines = ["⏱️  Time per phase (summed over memories): " + ", ".join(
+            f"{phase} {totals[phase]:.1f}s" for phase in PHASES if phase in totals and phase != 'total')]
+        bound, shares = self.bound()
+        if bound:
+            lines.append(f"🔎 Mostly {bound}-bound (" + ", ".join(
+                f"{stage} {share:.0%}" for stage, share in shares.items()) + ")")
+        return lines
@@ -1,10 +1,30 @@
+import calendar
 from dataclasses import dataclass
 from typing import Optional
+from .utils import parse_memory_date, format_stem
 
-@dataclass
+@dataclass(slots=True)
 class Memory:
     url: str
     date: str
     type: str
     latitude: Optional[float] = None
     longitude: Optional[float] = None
+    # Derived once by prepare(), so later stages never re-parse the date
+    timestamp: Optional[int] = None
+    folder: str = ""
+    stem: Optional[str] = None
+    kind: str = "image"
+
+    def prepare(self, organization_mode='by_date', filename_format='1'):
+        """Fill timestamp (UTC epoch), folder (relative to the output dir), stem and kind"""
+        date_obj = parse_memory_date(self.date)
+        if date_obj:
+            self.timestamp = calendar.timegm(date_obj.timetuple())
+            self.folder = date_obj.strftime("%Y/%m") if organization_mode == 'by_date' else ""
+        else:
+            self.timestamp = None
+            self.folder = "unknown_date" if organization_mode == 'by_date' else ""
+        self.stem = format_stem(date_obj, filename_format)
+        self.kind = 'video' if self.type.lower() == 'video' else 'image'
+        return self
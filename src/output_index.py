@@ -0,0 +1,131 @@
+import os
+import threading
+from pathlib import Path
+
+
+class OutputIndex:
+    """In-process listing of the output tree, built with one walk at startup.
+
+    Existence checks, prefix lookups and free-name allocation are answered
+    from memory instead of hitting the filesystem for every memory, which
+    matters on network shares. Allocation reserves the name under a lock,
+    so two workers can no longer pick the same "_1" suffix.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.dirs = {}
+        # Directory -> how many of its file names start with each stem (cut
+        # before a "." or "_"), for allocate_stem. ZIPs are left out: a kept
+        # ZIP is named after the stem its own outputs are about to use.
+        self.prefixes = {}
+        # (directory, name) pairs written during this run
+        self.created = set()
+        # Stems reserved for outputs named after them (a ZIP's _original, _composed... files)
+        self.stems = {}
+        self.lock = threading.Lock()
+        self.build()
+
+    @staticmethod
+    def key(directory):
+        return os.path.normpath(directory)
+
+    def build(self):
+        for root, dirs, files in os.walk(self.output_dir):
+            key = self.key(root)
+            self.dirs[key] = set(files)
+            for name in files:
+                self.count_prefixes(key, name, 1)
+
+    def count_prefixes(self, key, name, step):
+        """Add step to the prefix counts of a name; called with self.lock held (or while building)"""
+        if name.endswith('.zip'):
+            return
+        counts = self.prefixes.setdefault(key, {})
+        for position in range(1, len(name)):
+            if name[position] in '._':
+                prefix = name[:position]
+                counts[prefix] = counts.get(prefix, 0) + step
+                if not counts[prefix]:
+                    del counts[prefix]
+
+    def exists(self, path):
+        directory, name = os.path.split(path)
+        with self.lock:
+            return name in self.dirs.get(self.key(directory), ())
+
+    def find_prefix(self, directory, prefix, exclude_suffix=None, preexisting_only=False):
+        """Return the first file name in directory starting with prefix, or None"""
+        key = self.key(directory)
+        with self.lock:
+            for name in self.dirs.get(key, ()):
+                if not name.startswith(prefix) or (exclude_suffix and name.endswith(exclude_suffix)):
+                    continue
+                if preexisting_only and (key, name) in self.created:
+                    continue
+                return name
+        return None
+
+    def files_with_extension(self, extension):
+        with self.lock:
+            return [os.path.join(directory, name)
+                    for directory, names in self.dirs.items()
+                    for name in names if name.endswith(extension)]
+
+    def ensure_dir(self, directory):
+        key = self.key(directory)
+        with self.lock:
+            if key in self.dirs:
+                return
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            self.dirs.setdefault(key, set())
+
+    def allocate(self, directory, stem, extension):
+        """Reserve and return a free file name: stem.ext, then stem_1.ext, stem_2.ext..."""
+        key = self.key(directory)
+        with self.lock:
+            names = self.dirs.setdefault(key, set())
+            reserved = self.stems.get(key, ())
+            filename = f"{stem}.{extension}"
+            counter = 1
+            while filename in names or os.path.splitext(filename)[0] in reserved:
+                filename = f"{stem}_{counter}.{extension}"
+                counter += 1
+            names.add(filename)
+            self.count_prefixes(key, filename, 1)
+            self.created.add((key, filename))
+            return filename
+
+    def allocate_stem(self, directory, stem):
+        """Reserve and return a stem no file name but a ZIP uses yet: stem, then stem_1, stem_2..."""
+        key = self.key(directory)
+        with self.lock:
+            prefixes = self.prefixes.get(key, {})
+            reserved = self.stems.setdefault(key, set())
+            candidate = stem
+            counter = 1
+            while candidate in reserved or candidate in prefixes:
+                candidate = f"{stem}_{counter}"
+                counter += 1
+            reserved.add(candidate)
+            return candidate
+
+    def add(self, path):
+        directory, name = os.path.split(path)
+        key = self.key(directory)
+        with self.lock:
+            names = self.dirs.setdefault(key, set())
+            if name not in names:
+                names.add(name)
+                self.count_prefixes(key, name, 1)
+            self.created.add((key, name))
+
+    def remove(self, path):
+        directory, name = os.path.split(path)
+        key = self.key(directory)
+        with self.lock:
+            names = self.dirs.get(key, set())
+            if name in names:
+                names.remove(name)
+                self.count_prefixes(key, name, -1)
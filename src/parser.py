@@ -4,28 +4,56 @@ import sys
 from .models import Memory
 from .utils import print_color, Colors
 
+ROW_PATTERN = re.compile(r'<tr><td>([^<]+)</td><td>([^<]+)</td><td>([^<]+)</td><td>.*?onclick="downloadMemories\(\'([^\']+)\'')
+COORDS_PATTERN = re.compile(r'Latitude, Longitude:\s*([-\d.]+),\s*([-\d.]+)')
+ROW_END = '</tr>'
+READ_SIZE = 1024 * 1024
+
+
 class HTMLParser:
-    def __init__(self, html_file):
+    def __init__(self, html_file, organization_mode='by_date', filename_format='1'):
         self.html_file = html_file
+        self.organization_mode = organization_mode
+        self.filename_format = filename_format
 
-    def parse(self):
-        print_color("📄 Reading HTML file...", Colors.BLUE)
+    def iter_rows(self):
+        """Yield the HTML file one table row at a time, reading it in READ_SIZE chunks"""
+        with open(self.html_file, 'r', encoding='utf-8') as f:
+            buffer = ''
+            while True:
+                chunk = f.read(READ_SIZE)
+                if not chunk:
+                    break
+                buffer += chunk
 
+                start = 0
+                end = buffer.find(ROW_END)
+                while end != -1:
+                    yield buffer[start:end]
+                    start = end + len(ROW_END)
+                    end = buffer.find(ROW_END, start)
+                buffer = buffer[start:]
+
+            if buffer:
+                yield buffer
+
+    def iter_memories(self, prepare=True):
+        """Yield unique memories as they are found, without loading the whole file.
+
+        With prepare=False their dates are not parsed yet (see Memory.prepare).
+        """
         if not os.path.exists(self.html_file):
             print_color(f"❌ Error: File {self.html_file} does not exist", Colors.RED)
             sys.exit(1)
 
-        with open(self.html_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        pattern = r'<tr><td>([^<]+)</td><td>([^<]+)</td><td>([^<]+)</td><td>.*?onclick="downloadMemories\(\'([^\']+)\''
-        matches = re.findall(pattern, content)
-
-        memories = []
         seen_urls = set()
 
-        for match in matches:
-            date_str, media_type, location_str, url = match
+        for row in self.iter_rows():
+            match = ROW_PATTERN.search(row)
+            if not match:
+                continue
+
+            date_str, media_type, location_str, url = match.groups()
 
             if url in seen_urls:
                 continue
@@ -33,18 +61,24 @@ class HTMLParser:
 
             lat, lon = None, None
             if 'Latitude, Longitude:' in location_str:
-                coords_match = re.search(r'Latitude, Longitude:\s*([-\d.]+),\s*([-\d.]+)', location_str)
+                coords_match = COORDS_PATTERN.search(location_str)
                 if coords_match:
                     lat = float(coords_match.group(1))
                     lon = float(coords_match.group(2))
 
-            memories.append(Memory(
+            memory = Memory(
                 url=url,
                 date=date_str.strip(),
                 type=media_type.strip(),
                 latitude=lat,
                 longitude=lon
-            ))
+            )
+            yield memory.prepare(self.organization_mode, self.filename_format) if prepare else memory
+
+    def parse(self, prepare=True):
+        print_color("📄 Reading HTML file...", Colors.BLUE)
+
+        memories = list(self.iter_memories(prepare))
 
         print_color(f"✓ {len(memories)} unique memories found", Colors.GREEN)
         return memories
@@ -0,0 +1,129 @@
+import re
+import calendar
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from .config import TIMEOUT, IMAGE_SIZE_ESTIMATE, VIDEO_SIZE_ESTIMATE
+
+STRATEGIES = ('html', 'newest', 'images-first', 'mixed', 'expiring')
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%Y-%m")
+LINK_TIME_PATTERN = re.compile(r'[?&]ts=(\d+)')
+
+
+def link_time(url):
+    """When a download link was signed (epoch seconds, from its ts parameter), or None.
+
+    Links all live equally long, so the ones signed first expire first.
+    """
+    match = LINK_TIME_PATTERN.search(url)
+    if not match:
+        return None
+    ts = int(match.group(1))
+    # Milliseconds in Snapchat links
+    return ts / 1000 if ts > 10 ** 11 else ts
+
+
+def expiry_key(memory):
+    ts = link_time(memory.url)
+    return ts if ts is not None else float('inf')
+
+
+def parse_bound(value):
+    """Return the UTC epoch of a --since/--until value (YYYY-MM-DD[ HH:MM:SS] or YYYY-MM), or None"""
+    if not value:
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return calendar.timegm(datetime.strptime(value, date_format).timetuple())
+        except ValueError:
+            continue
+    raise ValueError(f"invalid date {value!r}, expected YYYY-MM-DD")
+
+
+def filter_dates(memories, since=None, until=None):
+    """Keep memories taken from since (included) until the end of the until day/month"""
+    since_ts, until_ts = parse_bound(since), parse_bound(until)
+    if since_ts is None and until_ts is None:
+        return memories
+
+    if until_ts is not None:
+        # A bare date means the whole day (or month): stop at the next one
+        if len(until) == 7:
+            year, month = int(until[:4]), int(until[5:7])
+            until_ts = calendar.timegm((year + month // 12, month % 12 + 1, 1, 0, 0, 0))
+        elif len(until) == 10:
+            until_ts += 24 * 3600
+        else:
+            until_ts += 1
+
+    return [memory for memory in memories if memory.timestamp is not None
+            and (since_ts is None or memory.timestamp >= since_ts)
+            and (until_ts is None or memory.timestamp < until_ts)]
+
+
+def head_sizes(memories, session, workers):
+    """Content-Length of each memory from concurrent HEAD requests (url -> size, when known)"""
+    # Only needed here, so ordering and --dry-run do not load the network stack
+    import requests
+
+    def head(memory):
+        try:
+            response = session.head(memory.url, timeout=TIMEOUT, allow_redirects=True)
+            length = response.headers.get('Content-Length', '')
+            return memory.url, int(length) if response.ok and length.isdigit() else None
+        except requests.exceptions.RequestException:
+            return memory.url, None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return {url: size for url, size in executor.map(head, memories) if size}
+
+
+class Scheduler:
+    """Orders (and prunes) memories before they are handed to a download engine.
+
+    Strategies: 'html' keeps the export's order, 'newest' starts with the
+    most recent memories, 'images-first' downloads every image before the
+    videos, and 'mixed' alternates the largest and smallest remaining files,
+    so big videos start early instead of forming a long tail while small
+    files keep the progress moving. Sizes come from earlier runs (manifest),
+    optionally from HEAD requests, else from a per-type estimate.
+    'expiring' starts with the links closest to expiry, so a long run does
+    not reach them after they died. Every other strategy uses expiry to
+    break its ties.
+    """
+
+    def __init__(self, strategy='html', manifest=None, sizes=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown schedule {strategy!r}, expected one of {', '.join(STRATEGIES)}")
+        self.strategy = strategy
+        self.manifest = manifest
+        self.sizes = sizes or {}
+
+    def size_hint(self, memory):
+        if memory.url in self.sizes:
+            return self.sizes[memory.url]
+        entry = self.manifest.get(memory.url) if self.manifest is not None else None
+        if entry:
+            # Failed downloads remember the size announced for their part file
+            size = entry.get('size') or (entry.get('partial') or {}).get('size')
+            if size:
+                return size
+        return VIDEO_SIZE_ESTIMATE if memory.kind == 'video' else IMAGE_SIZE_ESTIMATE
+
+    def order(self, memories):
+        # Sorts are stable: ordering by expiry first makes it the tie-break of every strategy
+        memories = sorted(memories, key=expiry_key)
+        if self.strategy == 'newest':
+            return sorted(memories, key=lambda memory: memory.timestamp or 0, reverse=True)
+        if self.strategy == 'images-first':
+            return sorted(memories, key=lambda memory: memory.kind == 'video')
+        if self.strategy == 'mixed':
+            by_size = sorted(memories, key=self.size_hint, reverse=True)
+            ordered = []
+            first, last = 0, len(by_size) - 1
+            while first <= last:
+                ordered.append(by_size[first])
+                if first != last:
+                    ordered.append(by_size[last])
+                first, last = first + 1, last - 1
+            return ordered
+        return memories
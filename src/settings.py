@@ -0,0 +1,144 @@
+import os
+import json
+import argparse
+from . import config
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+ENV_PREFIX = "SNAPCHAT_MEMORIES_"
+CONFIG_ENV = ENV_PREFIX + "CONFIG"
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+# Settings of src/config.py that can be overridden: name -> (type, choices, help).
+# Each one is also a command line option (--max-workers), an environment
+# variable (SNAPCHAT_MEMORIES_MAX_WORKERS) and a config file key (max_workers).
+OPTIONS = {
+    'HTML_FILE': (str, None, "memories_history.html to read"),
+    'OUTPUT_DIR': (str, None, "folder the memories are saved in"),
+    'ORGANIZATION_MODE': (str, ('by_date', 'flat'), "year/month folders or one folder (asked if not set)"),
+    'FILENAME_FORMAT': (str, ('1', '2', '3', '4'), "1: 20251215_213158, 2: 2025-12-15_21-31-58, "
+                                                  "3: 2025-12-15, 4: 20251215 (asked if not set)"),
+    'ZIP_MODE': (str, ('both', 'composed', 'original', 'all'), "what to keep from ZIPs (asked if not set)"),
+    'ENGINE': (str, ('threads', 'async'), "download engine"),
+    'PIPELINE': (bool, None, "with --keep-zips: process each saved ZIP as soon as it is downloaded"),
+    'KEEP_ZIPS': (bool, None, "save downloaded ZIPs and keep them after processing"),
+    'SCHEDULE': (str, ('html', 'newest', 'images-first', 'mixed', 'expiring'), "download order"),
+    'SYNC': (bool, None, "only download memories new or changed since the last run"),
+    'SINCE': (str, None, "only memories from this date (YYYY-MM-DD)"),
+    'UNTIL': (str, None, "only memories until this date, included (YYYY-MM-DD)"),
+    'HEAD_SIZES': (bool, None, "send a HEAD request per memory to schedule by size"),
+    'MAX_WORKERS': (int, None, "maximum parallel downloads"),
+    'MIN_WORKERS': (int, None, "concurrency never drops below this"),
+    'INITIAL_WORKERS': (int, None, "starting concurrency per host"),
+    'TIMEOUT': (float, None, "connect/read timeout in seconds"),
+    'JOBS_PER_WORKER': (int, None, "downloads queued or running per worker"),
+    'MAX_RETRIES': (int, None, "attempts per download"),
+    'RETRY_DELAY': (float, None, "base delay between attempts in seconds"),
+    'CHUNK_SIZE': (int, None, "bytes read at a time from a response"),
+    'DEDUP_MODE': (str, ('link', 'skip', 'off'), "what to do with content already downloaded"),
+    'ZIP_WORKERS': (int, None, "processes composing images"),
+    'FFMPEG_JOBS': (int, None, "concurrent ffmpeg video compositions"),
+    'PIPELINE_QUEUE_SIZE': (int, None, "ZIPs waiting between download and processing"),
+    'WRITE_METADATA': (bool, None, "embed capture time and GPS position into photos (EXIF) and videos"),
+    'METADATA_WORKERS': (int, None, "files whose metadata is written in parallel"),
+    'VIDEO_PRESET': (str, None, "x264 preset for composed videos"),
+    'VIDEO_CRF': (int, None, "x264 quality for composed videos"),
+    'VIDEO_THREADS': (int, None, "threads per ffmpeg job"),
+}
+
+
+class SettingsError(ValueError):
+    pass
+
+
+def option_flag(name):
+    return '--' + name.lower().replace('_', '-')
+
+
+def add_arguments(parser):
+    """Add --config and one option per setting to an argparse parser"""
+    parser.add_argument('--config', metavar='PATH',
+                        help=f"TOML or JSON file with settings (default: ${CONFIG_ENV})")
+    parser.add_argument('--non-interactive', action='store_true',
+                        help="never prompt: unset choices use the recommended defaults")
+    group = parser.add_argument_group("settings (override src/config.py, a config file and "
+                                      f"{ENV_PREFIX}* environment variables)")
+    for name, (kind, choices, help_text) in OPTIONS.items():
+        if kind is bool:
+            # --no-pipeline etc. turn off what a config file or the environment turned on
+            group.add_argument(option_flag(name), dest=name, action=argparse.BooleanOptionalAction, default=None,
+                               help=help_text)
+        else:
+            group.add_argument(option_flag(name), dest=name, type=kind, choices=choices, default=None,
+                               metavar=None if choices else name, help=help_text)
+
+
+def convert(name, value):
+    kind, choices, _ = OPTIONS[name]
+    try:
+        if kind is bool and isinstance(value, str):
+            if value.lower() not in TRUE_VALUES + FALSE_VALUES:
+                raise ValueError
+            value = value.lower() in TRUE_VALUES
+        else:
+            value = kind(value)
+    except (TypeError, ValueError):
+        raise SettingsError(f"{name}: invalid value {value!r}")
+    if choices and value not in choices:
+        raise SettingsError(f"{name}: {value!r} is not one of {', '.join(choices)}")
+    return value
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        if path.endswith('.json'):
+            data = json.load(f)
+        elif tomllib is None:
+            raise SettingsError(f"{path}: TOML needs Python 3.11+, use a .json file instead")
+        else:
+            data = tomllib.load(f)
+
+    values = {}
+    for key, value in data.items():
+        name = key.upper().replace('-', '_')
+        if name not in OPTIONS:
+            raise SettingsError(f"{path}: unknown setting {key!r}")
+        values[name] = convert(name, value)
+    return values
+
+
+def resolve(args, environ=os.environ):
+    """Merge the settings; later sources win: config file, then environment, then command line"""
+    values = {}
+    config_path = getattr(args, 'config', None) or environ.get(CONFIG_ENV)
+    if config_path:
+        values.update(read_file(config_path))
+
+    for name in OPTIONS:
+        if ENV_PREFIX + name in environ:
+            values[name] = convert(name, environ[ENV_PREFIX + name])
+
+    for name in OPTIONS:
+        value = getattr(args, name, None)
+        if value is not None:
+            values[name] = value
+    return values
+
+
+def apply(values):
+    """Write the settings into src.config. Modules copy its values when imported, so call this first."""
+    if 'FFMPEG_JOBS' in values and 'VIDEO_THREADS' not in values:
+        # Keep the default of sharing every core between the ffmpeg jobs
+        values['VIDEO_THREADS'] = max(1, (os.cpu_count() or 1) // max(1, values['FFMPEG_JOBS']))
+    for name, value in values.items():
+        setattr(config, name, value)
+
+
+def load(args, environ=os.environ):
+    values = resolve(args, environ)
+    apply(values)
+    return values
@@ -0,0 +1,164 @@
+import struct
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+# Bytes kept from the start of each download: enough for image headers and a faststart moov box
+SNIFF_SIZE = 64 * 1024
+
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+HEIF_BRANDS = {b'heic', b'heix', b'hevc', b'hevx', b'heim', b'heis', b'mif1', b'msf1'}
+QUICKTIME_BOXES = {b'moov', b'mdat', b'wide', b'free', b'skip', b'pnot'}
+ZIP_MEDIA_EXTENSIONS = {
+    '.jpg': 'image', '.jpeg': 'image', '.png': 'image', '.webp': 'image', '.heic': 'image',
+    '.mp4': 'video', '.mov': 'video',
+}
+
+CONTENT_TYPES = {
+    'image/jpeg': ('image', 'jpg'),
+    'image/png': ('image', 'png'),
+    'image/gif': ('image', 'gif'),
+    'image/webp': ('image', 'webp'),
+    'image/heic': ('image', 'heic'),
+    'image/heif': ('image', 'heic'),
+    'video/mp4': ('video', 'mp4'),
+    # QuickTime keeps the .mp4 name this project has always used for it
+    'video/quicktime': ('video', 'mp4'),
+    'application/zip': ('zip', 'zip'),
+}
+
+
+@dataclass(slots=True)
+class MediaInfo:
+    kind: str = 'unknown'
+    extension: str = 'dat'
+    mime: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    duration: Optional[float] = None
+    # For ZIPs: the kind of media inside ('image' or 'video'), if its entry is in the first bytes
+    contains: Optional[str] = None
+
+    def to_dict(self):
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+def jpeg_info(head):
+    info = MediaInfo('image', 'jpg', 'image/jpeg')
+    offset = 2
+    # Walk the segments (APP0/APP1/DQT/...) up to the frame header
+    while offset + 9 <= len(head):
+        if head[offset] != 0xFF:
+            break
+        marker = head[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        length = struct.unpack('>H', head[offset + 2:offset + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            info.height, info.width = struct.unpack('>HH', head[offset + 5:offset + 9])
+            break
+        if marker == 0xDA:
+            break
+        offset += 2 + length
+    return info
+
+
+def webp_info(head):
+    info = MediaInfo('image', 'webp', 'image/webp')
+    chunk = head[12:16]
+    if chunk == b'VP8X' and len(head) >= 30:
+        info.width = 1 + int.from_bytes(head[24:27], 'little')
+        info.height = 1 + int.from_bytes(head[27:30], 'little')
+    elif chunk == b'VP8 ' and len(head) >= 30:
+        width, height = struct.unpack('<HH', head[26:30])
+        info.width, info.height = width & 0x3FFF, height & 0x3FFF
+    elif chunk == b'VP8L' and len(head) >= 25:
+        bits = int.from_bytes(head[21:25], 'little')
+        info.width, info.height = (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    return info
+
+
+def iso_bmff_info(head, brand):
+    """HEIF images and MP4/MOV videos share the ISO base media box layout"""
+    if brand in HEIF_BRANDS or brand == b'avif':
+        info = MediaInfo('image', 'avif' if brand == b'avif' else 'heic',
+                         'image/avif' if brand == b'avif' else 'image/heic')
+        ispe = head.find(b'ispe')
+        if ispe != -1 and ispe + 16 <= len(head):
+            info.width, info.height = struct.unpack('>II', head[ispe + 8:ispe + 16])
+        return info
+
+    info = MediaInfo('video', 'mp4', 'video/quicktime' if brand == b'qt  ' else 'video/mp4')
+    mvhd = head.find(b'mvhd')
+    if mvhd != -1 and mvhd + 36 <= len(head):
+        if head[mvhd + 4] == 1:
+            timescale, duration = struct.unpack('>IQ', head[mvhd + 24:mvhd + 36])
+        else:
+            timescale, duration = struct.unpack('>II', head[mvhd + 16:mvhd + 24])
+        if timescale:
+            info.duration = round(duration / timescale, 3)
+
+    # The first track with a size is the video track (audio tracks are 0x0)
+    tkhd = head.find(b'tkhd')
+    while tkhd != -1:
+        start = tkhd + 4 + (88 if head[tkhd + 4] == 1 else 76)
+        if start + 8 > len(head):
+            break
+        width, height = struct.unpack('>II', head[start:start + 8])
+        if width and height:
+            info.width, info.height = width >> 16, height >> 16
+            break
+        tkhd = head.find(b'tkhd', tkhd + 4)
+    return info
+
+
+def zip_info(head):
+    """Look at the local file headers in the first bytes for the kind of media inside"""
+    info = MediaInfo('zip', 'zip', 'application/zip')
+    offset = 0
+    while head[offset:offset + 4] == b'PK\x03\x04' and offset + 30 <= len(head):
+        flags, = struct.unpack('<H', head[offset + 6:offset + 8])
+        compressed_size, = struct.unpack('<I', head[offset + 18:offset + 22])
+        name_length, extra_length = struct.unpack('<HH', head[offset + 26:offset + 30])
+        name = head[offset + 30:offset + 30 + name_length].decode('utf-8', 'replace').lower()
+
+        extension = name[name.rfind('.'):] if '.' in name else ''
+        if 'overlay' not in name and extension in ZIP_MEDIA_EXTENSIONS:
+            info.contains = ZIP_MEDIA_EXTENSIONS[extension]
+            break
+        if flags & 0x08:
+            # Sizes follow the data, so the next header cannot be located
+            break
+        offset += 30 + name_length + extra_length + compressed_size
+    return info
+
+
+def sniff(head, content_type=''):
+    """Identify a file from its first bytes, falling back to the Content-Type header"""
+    if head[:3] == b'\xff\xd8\xff':
+        return jpeg_info(head)
+    if head[:8] == b'\x89PNG\r\n\x1a\n':
+        info = MediaInfo('image', 'png', 'image/png')
+        if len(head) >= 24:
+            info.width, info.height = struct.unpack('>II', head[16:24])
+        return info
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        info = MediaInfo('image', 'gif', 'image/gif')
+        if len(head) >= 10:
+            info.width, info.height = struct.unpack('<HH', head[6:10])
+        return info
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return webp_info(head)
+    if head[:4] == b'PK\x03\x04':
+        return zip_info(head)
+    if head[4:8] == b'ftyp':
+        return iso_bmff_info(head, head[8:12])
+    if head[4:8] in QUICKTIME_BOXES:
+        # Old QuickTime files may start straight with a moov/mdat box
+        return iso_bmff_info(head, b'qt  ')
+
+    mime = content_type.split(';')[0].strip().lower()
+    if mime in CONTENT_TYPES:
+        kind, extension = CONTENT_TYPES[mime]
+        return MediaInfo(kind, extension, mime)
+    return MediaInfo()
@@ -0,0 +1,59 @@
+import os
+import re
+import json
+
+MEDIA_ID_PATTERN = re.compile(r'[?&]mid=([^&#]+)')
+
+
+def media_id(url):
+    """Stable ID of a memory: the mid parameter of its link (the link itself changes with every export)"""
+    match = MEDIA_ID_PATTERN.search(url)
+    return match.group(1) if match else url
+
+
+def fingerprint(memory):
+    """What makes a memory changed when its media ID is already known"""
+    return [memory.date, memory.type, memory.latitude, memory.longitude]
+
+
+class SyncIndex:
+    """.sync.json: the memories stored in an output folder, by media ID, as of the last run.
+
+    Snapchat exports grow over time, so a new export is diffed against it
+    and only new or changed memories are scheduled. Unchanged ones are
+    dropped before their dates are parsed or anything on disk is checked.
+    Run once without --sync to re-check the whole folder.
+    """
+
+    FILENAME = ".sync.json"
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self.entries = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def diff(self, memories):
+        """Return (new or changed memories, number of unchanged ones)"""
+        changed = [memory for memory in memories
+                   if self.entries.get(media_id(memory.url)) != fingerprint(memory)]
+        return changed, len(memories) - len(changed)
+
+    def save(self, memories, manifest):
+        """Add the memories this run stored (according to the manifest) to the index"""
+        for memory in memories:
+            entry = manifest.get(memory.url)
+            if entry and entry['status'] in ('success', 'skipped'):
+                self.entries[media_id(memory.url)] = fingerprint(memory)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, separators=(',', ':'))
+        os.replace(temp_path, self.path)
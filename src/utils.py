@@ -51,10 +51,39 @@ def ask_filename_format():
         else:
             print_color("❌ Invalid choice. Enter 1-4.", Colors.RED)
 
-def format_filename_date(date_str, format_type='1'):
+def ask_zip_mode():
+    print_color("\n" + "="*80, Colors.BLUE)
+    print_color("🗜️  ZIP FILE PROCESSING", Colors.BOLD)
+    print_color("="*80, Colors.BLUE)
+    print("\nZIP files contain the original media + a PNG overlay (text/drawings).")
+    print("\nAvailable options:")
+    print(f"{Colors.CYAN}1.{Colors.RESET} Original + composed (without separate PNG) (Recommended)")
+    print(f"{Colors.CYAN}2.{Colors.RESET} Composed only (with overlay applied)")
+    print(f"{Colors.CYAN}3.{Colors.RESET} Original only (without overlay)")
+    print(f"{Colors.CYAN}4.{Colors.RESET} Keep everything: original + overlay + composed")
+
+    modes = {'1': 'both', '2': 'composed', '3': 'original', '4': 'all'}
+    while True:
+        choice = input(f"\n{Colors.BOLD}Your choice [1-4]:{Colors.RESET} ").strip()
+        if choice in modes:
+            return modes[choice]
+        else:
+            print_color("❌ Invalid choice. Enter a number between 1 and 4.", Colors.RED)
+
+def parse_memory_date(date_str):
+    """Parse 'YYYY-MM-DD HH:MM:SS UTC' into a naive UTC datetime, or None"""
     from datetime import datetime
     try:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S UTC")
+        # Slicing is several times faster than strptime for the fixed export format
+        if len(date_str) == 23 and date_str.endswith(' UTC'):
+            return datetime(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+                            int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19]))
+        return datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S UTC")
+    except ValueError:
+        return None
+
+def format_stem(date_obj, format_type='1'):
+    if date_obj:
         if format_type == '1':
             return date_obj.strftime("%Y%m%d_%H%M%S")
         elif format_type == '2':
@@ -63,6 +92,7 @@ def format_filename_date(date_str, format_type='1'):
             return date_obj.strftime("%Y-%m-%d")
         elif format_type == '4':
             return date_obj.strftime("%Y%m%d")
-    except:
-        pass
     return "unknown"
+
+def format_filename_date(date_str, format_type='1'):
+    return format_stem(parse_memory_date(date_str), format_type)
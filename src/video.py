@@ -0,0 +1,193 @@
+import os
+import re
+import json
+import shutil
+import threading
+import subprocess
+import time
+from .image import overlay_is_empty
+from .config import VIDEO_CODEC, VIDEO_PRESET, VIDEO_CRF, VIDEO_THREADS
+
+# Anything smaller holds no frame: ffmpeg can exit 0 having encoded nothing
+MIN_OUTPUT_SIZE = 1024
+
+# Lines of `ffmpeg -i` output, for hosts with ffmpeg but no ffprobe
+STREAM_SIZE_PATTERN = re.compile(r'Stream #\d+:\d+.*?: Video: .*?\b(\d{2,5})x(\d{2,5})\b')
+DURATION_PATTERN = re.compile(r'Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+ROTATION_PATTERN = re.compile(r'(?:rotate\s*:|rotation of)\s*(-?\d+(?:\.\d+)?)')
+
+
+def link_or_copy(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+class VideoComposer:
+    """Burns a PNG overlay into a video with ffmpeg.
+
+    The video is probed once (display size and duration), the overlay is
+    scaled to it, and the encoder preset, CRF and thread count come from
+    the config. A fully transparent overlay skips ffmpeg entirely. Each
+    encode is timed so throughput can be tuned.
+    """
+
+    def __init__(self, codec=VIDEO_CODEC, preset=VIDEO_PRESET, crf=VIDEO_CRF,
+                 threads=VIDEO_THREADS):
+        self.codec = codec
+        self.preset = preset
+        self.crf = crf
+        self.threads = threads
+        self.lock = threading.Lock()
+        self.encode_times = []
+        self.encoded_duration = 0.0
+        self.skipped_count = 0
+
+    @staticmethod
+    def displayed(width, height, rotation):
+        # ffmpeg auto-rotates the input before filters, so the overlay must match the rotated size
+        if rotation is not None and abs(int(float(rotation))) % 180 == 90:
+            return height, width
+        return width, height
+
+    @classmethod
+    def probe(cls, video_path):
+        """Return (width, height, duration) as displayed, or None if the file has no readable video stream"""
+        if not shutil.which('ffprobe'):
+            return cls.probe_with_ffmpeg(video_path)
+
+        cmd = [
+            'ffprobe', '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries',
+            'stream=width,height:stream_tags=rotate:stream_side_data=rotation:format=duration',
+            '-of', 'json',
+            video_path
+        ]
+        try:
+            result = subprocess.run(cmd, check=True, capture_output=True)
+            info = json.loads(result.stdout)
+            stream = info['streams'][0]
+            width, height = int(stream['width']), int(stream['height'])
+        except Exception:
+            return None
+
+        rotation = stream.get('tags', {}).get('rotate')
+        for side_data in stream.get('side_data_list', []):
+            rotation = side_data.get('rotation', rotation)
+        width, height = cls.displayed(width, height, rotation)
+
+        try:
+            duration = float(info.get('format', {}).get('duration', 0))
+        except ValueError:
+            duration = 0.0
+        return width, height, duration
+
+    @classmethod
+    def probe_with_ffmpeg(cls, video_path):
+        """probe() from the stream list `ffmpeg -i` prints (it exits 1, having no output file)"""
+        try:
+            result = subprocess.run(['ffmpeg', '-hide_banner', '-i', video_path], capture_output=True, text=True,
+                                    errors='replace')
+        except Exception:
+            return None
+
+        size = STREAM_SIZE_PATTERN.search(result.stderr)
+        if not size:
+            return None
+        rotation = ROTATION_PATTERN.search(result.stderr)
+        width, height = cls.displayed(int(size.group(1)), int(size.group(2)),
+                                      rotation.group(1) if rotation else None)
+
+        duration = DURATION_PATTERN.search(result.stderr)
+        seconds = 0.0
+        if duration:
+            hours, minutes, rest = duration.groups()
+            seconds = int(hours) * 3600 + int(minutes) * 60 + float(rest)
+        return width, height, seconds
+
+    def build_command(self, video_path, output_path, probe):
+        if probe:
+            width, height, _ = probe
+            # The overlay's single frame is repeated until the video ends
+            graph = f"[1:v]scale={width}:{height}[ov];[0:v][ov]overlay=format=auto"
+        else:
+            # Unknown size: let ffmpeg scale the overlay to the video itself. scale2ref
+            # needs an overlay frame per video frame, so the single PNG frame is looped.
+            graph = ("[1:v]loop=loop=-1:size=1[looped];[looped][0:v]scale2ref[ov][base];"
+                     "[base][ov]overlay=format=auto:shortest=1")
+
+        cmd = [
+            'ffmpeg',
+            '-i', video_path,
+            '-f', 'png_pipe', '-i', 'pipe:0',
+            # An RGBA overlay would make it 4:4:4, which most players cannot decode
+            '-filter_complex', f"{graph},format=yuv420p",
+            '-c:v', self.codec,
+            '-preset', self.preset,
+            '-crf', str(self.crf),
+            '-threads', str(self.threads),
+            '-codec:a', 'copy',
+            '-movflags', '+faststart',
+            '-y',
+            output_path
+        ]
+        return cmd
+
+    def compose(self, video_path, overlay_data, output_path):
+        """Overlay a PNG (given as bytes, fed through stdin) on a video file"""
+        try:
+            if overlay_is_empty(overlay_data):
+                link_or_copy(video_path, output_path)
+                with self.lock:
+                    self.skipped_count += 1
+                return True
+        except Exception:
+            pass
+
+        probe = self.probe(video_path)
+        start = time.perf_counter()
+        try:
+            subprocess.run(self.build_command(video_path, output_path, probe),
+                           input=overlay_data, check=True, capture_output=True)
+        except Exception:
+            return False
+        elapsed = time.perf_counter() - start
+
+        if not self.is_valid_output(output_path, probe):
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return False
+
+        with self.lock:
+            self.encode_times.append((os.path.basename(output_path), elapsed))
+            if probe:
+                self.encoded_duration += probe[2]
+        return True
+
+    def is_valid_output(self, output_path, source_probe=None):
+        """An encode may succeed having written few frames or none: check the output holds the whole video"""
+        try:
+            if os.path.getsize(output_path) < MIN_OUTPUT_SIZE:
+                return False
+        except OSError:
+            return False
+        output_probe = self.probe(output_path)
+        if output_probe is None:
+            return False
+        return not (source_probe and output_probe[2] < source_probe[2] / 2)
+
+    def summary_lines(self):
+        lines = []
+        if self.encode_times:
+            total = sum(seconds for _, seconds in self.encode_times)
+            slowest_name, slowest = max(self.encode_times, key=lambda item: item[1])
+            lines.append(f"⏱️  Video encoding: {len(self.encode_times)} videos in {total:.1f}s "
+                         f"(avg {total / len(self.encode_times):.2f}s, slowest {slowest:.2f}s: {slowest_name})")
+            if self.encoded_duration and total:
+                lines.append(f"🎞️  Encode speed: {self.encoded_duration / total:.2f}x realtime "
+                             f"(preset {self.preset}, crf {self.crf}, {self.threads or 'auto'} threads)")
+        if self.skipped_count:
+            lines.append(f"⏭️  Transparent overlays skipped: {self.skipped_count}")
+        return lines
@@ -1,21 +1,52 @@
 import os
 import re
 import zipfile
-import subprocess
 import time
-from io import BytesIO
+import calendar
+import threading
+import multiprocessing
 from datetime import datetime
 from tqdm import tqdm
-from .utils import print_color, Colors
-from .config import MAX_RETRIES, RETRY_DELAY
-from PIL import Image
+from .utils import print_color, Colors, ask_zip_mode
+from . import config, settings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .config import MAX_RETRIES, RETRY_DELAY, ZIP_WORKERS, FFMPEG_JOBS, \
+    PIPELINE_QUEUE_SIZE
+from .manifest import Manifest
+from .metrics import Metrics, timed
+from .sniff import sniff, SNIFF_SIZE
+
+
+def process_zip_job(mode, zip_path, target_dir, date_formatted, timestamp):
+    """Entry point for pool workers: process one ZIP without touching the manifest.
+
+    The parent has already checked for existing outputs in its OutputIndex.
+    """
+    processor = ZipProcessor(target_dir, mode)
+    return processor.process_single_zip(zip_path, target_dir, date_formatted,
+                                        timestamp, check_existing=False)
 
 
 class ZipProcessor:
-    def __init__(self, output_dir, mode, filename_format='1'):
+    def __init__(self, output_dir, mode, filename_format='1', manifest=None,
+                 keep_zips=False, index=None, metrics=None):
         self.output_dir = output_dir
         self.mode = mode
         self.filename_format = filename_format
+        self.manifest = manifest
+        self.keep_zips = keep_zips
+        self.index = index
+        self.metrics = metrics or Metrics()
+        self._video_composer = None
+
+        self.submitted_count = 0
+        self.processed_count = 0
+        self.failed_count = 0
+        self.images_count = 0
+        self.videos_count = 0
+        self.start_time = None
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
 
     @staticmethod
     def parse_date_from_filename(date_formatted):
@@ -34,15 +65,20 @@ class ZipProcessor:
                     pass
         return None
 
+    @classmethod
+    def timestamp_from_filename(cls, date_formatted):
+        """Fallback for ZIPs found on disk, whose Memory is not known"""
+        date_obj = cls.parse_date_from_filename(date_formatted)
+        return calendar.timegm(date_obj.timetuple()) if date_obj else None
+
     @staticmethod
-    def set_file_date(filepath, date_obj):
-        if date_obj and os.path.exists(filepath):
-            timestamp = date_obj.timestamp()
+    def set_file_date(filepath, timestamp):
+        if timestamp is not None and os.path.exists(filepath):
             os.utime(filepath, (timestamp, timestamp))
 
     @staticmethod
     def check_already_processed(target_dir, date_formatted):
-        """Check if ZIP has already been processed by looking for output files"""
+        """Return the path of an existing output file for this ZIP, or False if there is none"""
         if not os.path.exists(target_dir):
             return False
 
@@ -54,95 +90,61 @@ class ZipProcessor:
             for f in existing_files:
                 filepath = os.path.join(target_dir, f)
                 if os.path.getsize(filepath) > 0:
-                    return True
+                    return filepath
         return False
 
-    @staticmethod
-    def ask_processing_mode():
-        print_color("\n" + "=" * 80, Colors.BLUE)
-        print_color("🗜️  ZIP FILE PROCESSING", Colors.BOLD)
-        print_color("=" * 80, Colors.BLUE)
-        print(
-            "\nZIP files contain the original media + a PNG overlay (text/drawings).")
-        print("\nAvailable options:")
-        print(
-            f"{Colors.CYAN}1.{Colors.RESET} Original + composed (without separate PNG) (Recommended)")
-        print(
-            f"{Colors.CYAN}2.{Colors.RESET} Composed only (with overlay applied)")
-        print(
-            f"{Colors.CYAN}3.{Colors.RESET} Original only (without overlay)")
-        print(
-            f"{Colors.CYAN}4.{Colors.RESET} Keep everything: original + overlay + composed")
-
-        while True:
-            choice = input(
-                f"\n{Colors.BOLD}Your choice [1-4]:{Colors.RESET} ").strip()
-            if choice == '1':
-                return 'both'
-            elif choice == '2':
-                return 'composed'
-            elif choice == '3':
-                return 'original'
-            elif choice == '4':
-                return 'all'
-            else:
-                print_color("❌ Invalid choice. Enter a number between 1 and 4.",
-                            Colors.RED)
+    def find_processed(self, target_dir, date_formatted):
+        """Same as check_already_processed, answered from the OutputIndex when there is one"""
+        if self.index is None:
+            return self.check_already_processed(target_dir, date_formatted)
 
-    @staticmethod
-    def compose_image(media_data, overlay_data, output_path):
-        if not Image:
-            return False
+        name = self.index.find_prefix(target_dir, date_formatted,
+                                      exclude_suffix='.zip')
+        return os.path.join(target_dir, name) if name else False
 
-        try:
-            base_img = Image.open(BytesIO(media_data))
-            overlay_img = Image.open(BytesIO(overlay_data))
-
-            if base_img.mode != 'RGBA':
-                base_img = base_img.convert('RGBA')
-            if overlay_img.mode != 'RGBA':
-                overlay_img = overlay_img.convert('RGBA')
+    def allocate_stem(self, target_dir, date_formatted):
+        """Reserve the stem a ZIP's outputs are named after, so memories of the same second never share one"""
+        if self.index is None:
+            return date_formatted
+        return self.index.allocate_stem(target_dir, date_formatted)
 
-            if overlay_img.size != base_img.size:
-                overlay_img = overlay_img.resize(base_img.size,
-                                                 Image.Resampling.LANCZOS)
+    ask_processing_mode = staticmethod(ask_zip_mode)
 
-            composed = Image.alpha_composite(base_img, overlay_img)
+    @property
+    def video_composer(self):
+        # Created on first use: ffmpeg support pulls in Pillow and subprocess
+        with self.lock:
+            if self._video_composer is None:
+                from .video import VideoComposer
+                self._video_composer = VideoComposer()
+            return self._video_composer
 
-            if output_path.lower().endswith('.jpg'):
-                composed = composed.convert('RGB')
+    @staticmethod
+    def compose_image(media_data, overlay_data, output_path):
+        from . import image
+        return image.compose_image(media_data, overlay_data, output_path)
 
-            composed.save(output_path, quality=95)
-            return True
-        except Exception:
-            return False
+    def compose_video(self, video_path, overlay_data, output_path):
+        """Overlay a PNG (given as bytes) on a video file"""
+        return self.video_composer.compose(video_path, overlay_data,
+                                           output_path)
 
-    @staticmethod
-    def compose_video(video_path, overlay_path, output_path):
-        try:
-            cmd = [
-                'ffmpeg',
-                '-i', video_path,
-                '-i', overlay_path,
-                '-filter_complex', '[0:v][1:v]overlay',
-                '-codec:a', 'copy',
-                '-y',
-                output_path
-            ]
-            subprocess.run(cmd, check=True, capture_output=True)
-            return True
-        except Exception:
-            return False
+    def process_single_zip(self, zip_path, target_dir, date_formatted,
+                           timestamp=None, check_existing=True):
+        """Return the path of the main output file, or False on failure"""
+        if check_existing:
+            existing_path = self.find_processed(target_dir, date_formatted)
+            if existing_path:
+                return existing_path
 
-    def process_single_zip(self, zip_path, target_dir, date_formatted):
-        if self.check_already_processed(target_dir, date_formatted):
-            return 'skipped'
+        if timestamp is None:
+            timestamp = self.timestamp_from_filename(date_formatted)
 
         last_error = None
         for attempt in range(MAX_RETRIES):
             try:
                 return self._process_single_zip_impl(zip_path, target_dir,
-                                                     date_formatted)
+                                                     date_formatted, timestamp)
             except Exception as e:
                 last_error = e
                 if attempt < MAX_RETRIES - 1:
@@ -151,10 +153,9 @@ class ZipProcessor:
                 else:
                     return False
 
-    def _process_single_zip_impl(self, zip_path, target_dir, date_formatted):
+    def _process_single_zip_impl(self, zip_path, target_dir, date_formatted,
+                                 timestamp):
         try:
-            date_obj = self.parse_date_from_filename(date_formatted)
-
             with zipfile.ZipFile(zip_path, 'r') as zip_ref:
                 file_list = zip_ref.namelist()
 
@@ -184,12 +185,17 @@ class ZipProcessor:
                 overlay_data = zip_ref.read(
                     overlay_file) if overlay_file else None
 
-                media_ext = os.path.splitext(media_file)[1].lower().replace('.',
-                                                                            '')
-                if media_ext == 'jpeg':
-                    media_ext = 'jpg'
-                elif media_ext == 'mov':
-                    media_ext = 'mp4'
+                media_info = sniff(media_data[:SNIFF_SIZE])
+                if media_info.kind in ('image', 'video'):
+                    # Trust the bytes over the entry name (e.g. a PNG stored as .jpg)
+                    media_ext = media_info.extension
+                else:
+                    media_ext = os.path.splitext(media_file)[1].lower().replace('.',
+                                                                                '')
+                    if media_ext == 'jpeg':
+                        media_ext = 'jpg'
+                    elif media_ext == 'mov':
+                        media_ext = 'mp4'
 
                 is_video = media_ext in ['mp4']
                 is_image = media_ext in ['jpg', 'png']
@@ -199,123 +205,110 @@ class ZipProcessor:
                                                  f"{date_formatted}_original.{media_ext}")
                     with open(original_path, 'wb') as f:
                         f.write(media_data)
-                    self.set_file_date(original_path, date_obj)
+                    self.set_file_date(original_path, timestamp)
 
                     if overlay_data:
                         overlay_path = os.path.join(target_dir,
                                                     f"{date_formatted}_overlay.png")
                         with open(overlay_path, 'wb') as f:
                             f.write(overlay_data)
-                        self.set_file_date(overlay_path, date_obj)
+                        self.set_file_date(overlay_path, timestamp)
 
-                        if is_image and Image:
+                        if is_image:
                             try:
                                 composed_path = os.path.join(target_dir,
                                                              f"{date_formatted}_composed.{media_ext}")
                                 self.compose_image(media_data, overlay_data,
                                                    composed_path)
-                                self.set_file_date(composed_path, date_obj)
+                                self.set_file_date(composed_path, timestamp)
                             except:
                                 pass
                         elif is_video:
                             try:
                                 composed_path = os.path.join(target_dir,
                                                              f"{date_formatted}_composed.{media_ext}")
-                                self.compose_video(original_path, overlay_path,
+                                self.compose_video(original_path, overlay_data,
                                                    composed_path)
-                                self.set_file_date(composed_path, date_obj)
+                                self.set_file_date(composed_path, timestamp)
                             except:
                                 pass
 
                 elif self.mode == 'composed':
                     if overlay_data:
-                        if is_image and Image:
+                        if is_image:
                             composed_path = os.path.join(target_dir,
                                                          f"{date_formatted}.{media_ext}")
                             self.compose_image(media_data, overlay_data,
                                                composed_path)
-                            self.set_file_date(composed_path, date_obj)
+                            self.set_file_date(composed_path, timestamp)
                         elif is_video:
+                            # MP4 needs a seekable input, so only the video goes through a temp file
                             temp_video = os.path.join(target_dir,
                                                       f"{date_formatted}_temp.{media_ext}")
-                            temp_overlay = os.path.join(target_dir,
-                                                        f"{date_formatted}_temp_overlay.png")
                             composed_path = os.path.join(target_dir,
                                                          f"{date_formatted}.{media_ext}")
 
                             with open(temp_video, 'wb') as f:
                                 f.write(media_data)
-                            with open(temp_overlay, 'wb') as f:
-                                f.write(overlay_data)
 
-                            if self.compose_video(temp_video, temp_overlay,
+                            if self.compose_video(temp_video, overlay_data,
                                                   composed_path):
                                 os.remove(temp_video)
-                                os.remove(temp_overlay)
-                                self.set_file_date(composed_path, date_obj)
+                                self.set_file_date(composed_path, timestamp)
                             else:
                                 os.rename(temp_video, composed_path)
-                                self.set_file_date(composed_path, date_obj)
-                                if os.path.exists(temp_overlay):
-                                    os.remove(temp_overlay)
+                                self.set_file_date(composed_path, timestamp)
                         else:
                             original_path = os.path.join(target_dir,
                                                          f"{date_formatted}.{media_ext}")
                             with open(original_path, 'wb') as f:
                                 f.write(media_data)
-                            self.set_file_date(original_path, date_obj)
+                            self.set_file_date(original_path, timestamp)
                     else:
                         original_path = os.path.join(target_dir,
                                                      f"{date_formatted}.{media_ext}")
                         with open(original_path, 'wb') as f:
                             f.write(media_data)
-                        self.set_file_date(original_path, date_obj)
+                        self.set_file_date(original_path, timestamp)
 
                 elif self.mode == 'original':
                     original_path = os.path.join(target_dir,
                                                  f"{date_formatted}.{media_ext}")
                     with open(original_path, 'wb') as f:
                         f.write(media_data)
-                    self.set_file_date(original_path, date_obj)
+                    self.set_file_date(original_path, timestamp)
 
                 elif self.mode == 'both':
                     original_path = os.path.join(target_dir,
                                                  f"{date_formatted}_original.{media_ext}")
                     with open(original_path, 'wb') as f:
                         f.write(media_data)
-                    self.set_file_date(original_path, date_obj)
+                    self.set_file_date(original_path, timestamp)
 
                     if overlay_data:
-                        if is_image and Image:
+                        if is_image:
                             try:
                                 composed_path = os.path.join(target_dir,
                                                              f"{date_formatted}_composed.{media_ext}")
                                 self.compose_image(media_data, overlay_data,
                                                    composed_path)
-                                self.set_file_date(composed_path, date_obj)
+                                self.set_file_date(composed_path, timestamp)
                             except:
                                 pass
                         elif is_video:
                             try:
-                                temp_overlay = os.path.join(target_dir,
-                                                            f"{date_formatted}_temp_overlay.png")
-                                with open(temp_overlay, 'wb') as f:
-                                    f.write(overlay_data)
-
                                 composed_path = os.path.join(target_dir,
                                                              f"{date_formatted}_composed.{media_ext}")
                                 if self.compose_video(original_path,
-                                                      temp_overlay,
+                                                      overlay_data,
                                                       composed_path):
-                                    os.remove(temp_overlay)
-                                    self.set_file_date(composed_path, date_obj)
-                                else:
-                                    if os.path.exists(temp_overlay):
-                                        os.remove(temp_overlay)
+                                    self.set_file_date(composed_path, timestamp)
                             except:
                                 pass
 
-                return True
+                if self.mode in ('all', 'both'):
+                    return os.path.join(target_dir, f"{date_formatted}_original.{media_ext}")
+                return os.path.join(target_dir, f"{date_formatted}.{media_ext}")
 
         except Exception:
             return False
@@ -323,79 +316,253 @@ class ZipProcessor:
     def process_all(self):
         print_color("\n🗜️  Processing ZIP files...", Colors.BLUE)
 
-        zip_files = []
-        for root, dirs, files in os.walk(self.output_dir):
-            for filename in files:
-                if filename.endswith('.zip'):
-                    zip_path = os.path.join(root, filename)
-                    zip_files.append((zip_path, root, filename))
+        if self.index is not None:
+            zip_files = self.index.files_with_extension('.zip')
+        else:
+            zip_files = []
+            for root, dirs, files in os.walk(self.output_dir):
+                for filename in files:
+                    if filename.endswith('.zip'):
+                        zip_files.append(os.path.join(root, filename))
+
+        started = self.start_time is not None
+        if not zip_files:
+            if started:
+                self.finish()
+            else:
+                self.print_summary()
+            return
 
-        total = len(zip_files)
+        if not started:
+            self.start(total=len(zip_files))
+        for zip_path in zip_files:
+            self.submit(zip_path)
+        self.finish()
+
+    def start(self, total=None, position=0, shared=None):
+        """Open the worker pools; ZIPs can then be submitted one by one as they appear.
+
+        With shared, the pools and queue of that started processor are used, so
+        the exports of a batch stay within ZIP_WORKERS and FFMPEG_JOBS together.
+        """
+        if self.manifest is None:
+            self.manifest = Manifest(self.output_dir)
+
+        self.start_time = time.time()
+        self.pending = 0
+        self.owns_pools = shared is None
+        if shared is not None:
+            self.slots, self.image_pool, self.video_pool = shared.slots, shared.image_pool, shared.video_pool
+        else:
+            # Bounds the queue between whoever submits ZIPs and the workers
+            self.slots = threading.BoundedSemaphore(PIPELINE_QUEUE_SIZE)
+            self.image_pool = self.create_image_pool()
+            # ffmpeg does its own work in a subprocess, so threads are enough to run several at once
+            self.video_pool = ThreadPoolExecutor(max_workers=FFMPEG_JOBS)
+        self.pbar = tqdm(total=total, desc="🗜️  Processing ZIPs", unit="zip",
+                         bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]"
+                         if total else "{desc}: {n_fmt} [{elapsed}, {rate_fmt}]{postfix}",
+                         colour="cyan", position=position)
 
-        if total == 0:
+    @staticmethod
+    def create_image_pool():
+        """Process pool for image ZIPs.
+
+        Its workers start on the first submit, which comes from a download
+        thread: a forked child could inherit an import lock another thread
+        holds (e.g. while Pillow loads) and hang. Spawned children start
+        clean, and get this run's settings before the jobs import anything.
+        """
+        values = {name: getattr(config, name) for name in settings.OPTIONS}
+        return ProcessPoolExecutor(max_workers=ZIP_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=settings.apply, initargs=(values,))
+
+    def submit_file(self, filepath, memory=None):
+        """Downloader hook: queue the file if it is a ZIP"""
+        if filepath.endswith('.zip'):
+            self.submit(filepath, memory)
+
+    def submit(self, zip_path, memory=None):
+        """Queue one ZIP, blocking while PIPELINE_QUEUE_SIZE ZIPs are already waiting"""
+        target_dir, filename = os.path.split(zip_path)
+        with self.lock:
+            self.submitted_count += 1
+
+        if memory is not None:
+            date_formatted, timestamp = memory.stem, memory.timestamp
+            is_video = self.count_kind(memory.kind == 'video')
+        else:
+            date_match = (
+                    re.search(r'(\d{8}_\d{6})', filename) or
+                    re.search(r'(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})',
+                              filename) or
+                    re.search(r'(\d{4}-\d{2}-\d{2})', filename) or
+                    re.search(r'(\d{8})', filename)
+            )
+
+            if not date_match:
+                self.record_zip_result(zip_path, False)
+                return
+
+            date_formatted, timestamp = date_match.group(1), None
+            # The downloader sniffed the kind inside; only older ZIPs have to be opened
+            contains = self.manifest.media_for_path(zip_path).get('contains')
+            try:
+                is_video = self.count_kind(contains == 'video') if contains else self.count_zip_kind(zip_path)
+            except Exception:
+                self.record_zip_result(zip_path, False)
+                return
+
+        # A ZIP the manifest still points at is not processed yet; kept or older
+        # ZIPs may be, which only their outputs' names tell
+        if memory is None and not self.manifest.owns_path(zip_path):
+            existing_path = self.find_processed(target_dir, date_formatted)
+            if existing_path:
+                self.record_zip_result(zip_path, existing_path)
+                return
+        date_formatted = self.allocate_stem(target_dir, date_formatted)
+
+        self.slots.acquire()
+        if is_video:
+            # Runs in this process so encode timings land in self.video_composer
+            future = self.video_pool.submit(
+                timed, self.process_single_zip, zip_path, target_dir,
+                date_formatted, timestamp, check_existing=False)
+        else:
+            future = self.image_pool.submit(
+                timed, process_zip_job, self.mode, zip_path, target_dir,
+                date_formatted, timestamp)
+        kind = 'video' if is_video else 'image'
+        self.track(future, lambda done: self.on_zip_done(zip_path, done, kind))
+
+    def track(self, future, callback):
+        """Run callback once the job is done, counting it as pending until then"""
+        def done(finished):
+            try:
+                callback(finished)
+            finally:
+                with self.lock:
+                    self.pending -= 1
+                    self.idle.notify_all()
+
+        with self.lock:
+            self.pending += 1
+        future.add_done_callback(done)
+
+    def count_kind(self, is_video):
+        with self.lock:
+            if is_video:
+                self.videos_count += 1
+            else:
+                self.images_count += 1
+        return is_video
+
+    def count_zip_kind(self, zip_file):
+        """Return True if the ZIP holds a video, updating the image/video counters"""
+        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+            return self.count_kind(any(
+                f.lower().endswith(('.mp4', '.mov')) for f in
+                zip_ref.namelist()))
+
+    def process_payload(self, zip_path, target_dir, memory, on_done):
+        """Queue a downloaded ZIP still in its part file, so it is never saved.
+
+        Like submit(), it blocks while PIPELINE_QUEUE_SIZE ZIPs are waiting.
+        on_done(main output path, or False) is called once it is processed;
+        the part file is the caller's to remove.
+        """
+        with self.lock:
+            self.submitted_count += 1
+        is_video = self.count_kind(memory.kind == 'video')
+        # The manifest decided to download it, so its outputs are new: no existing check
+        date_formatted = self.allocate_stem(target_dir, memory.stem)
+
+        self.slots.acquire()
+        try:
+            if is_video:
+                future = self.video_pool.submit(
+                    timed, self.process_single_zip, zip_path, target_dir,
+                    date_formatted, memory.timestamp, check_existing=False)
+            else:
+                future = self.image_pool.submit(
+                    timed, process_zip_job, self.mode, zip_path, target_dir,
+                    date_formatted, memory.timestamp)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.track(future, lambda done: self.on_payload_done(done, memory.kind, on_done))
+
+    def on_payload_done(self, future, kind, on_done):
+        try:
+            output_path, seconds = future.result()
+            self.metrics.observe('compose', seconds, kind)
+        except Exception:
+            output_path = False
+        with self.lock:
+            self.count_result(output_path)
+        self.slots.release()
+        on_done(output_path)
+
+    def on_zip_done(self, zip_path, future, kind):
+        try:
+            output_path, seconds = future.result()
+            self.metrics.observe('compose', seconds, kind)
+        except Exception:
+            output_path = False
+        self.record_zip_result(zip_path, output_path)
+        self.slots.release()
+
+    def record_zip_result(self, zip_path, output_path):
+        with self.lock:
+            if output_path:
+                self.manifest.replace_path(zip_path, output_path)
+                if not self.keep_zips:
+                    os.remove(zip_path)
+                    if self.index is not None:
+                        self.index.remove(zip_path)
+            self.count_result(output_path)
+
+    def count_result(self, output_path):
+        """Update the counters and the progress bar; called with self.lock held"""
+        if output_path:
+            self.processed_count += 1
+            if self.index is not None:
+                self.index.add(output_path)
+        else:
+            self.failed_count += 1
+
+        self.pbar.set_postfix_str(
+            f"✓ {self.processed_count} | ✗ {self.failed_count} | 🖼️  {self.images_count} | 🎬 {self.videos_count}")
+        self.pbar.update(1)
+
+    def finish(self):
+        # Shared pools may still run other exports' ZIPs: only wait for ours
+        with self.lock:
+            self.idle.wait_for(lambda: self.pending == 0)
+        if self.owns_pools:
+            self.image_pool.shutdown(wait=True)
+            self.video_pool.shutdown(wait=True)
+        self.pbar.close()
+        self.manifest.close()
+        self.print_summary()
+
+    def print_summary(self):
+        if self.submitted_count == 0:
             print_color("ℹ️  No ZIP files found", Colors.YELLOW)
             return
 
-        processed_count = 0
-        failed_count = 0
-        images_count = 0
-        videos_count = 0
-
-        with tqdm(total=total, desc="🗜️  Processing ZIPs", unit="zip",
-                  bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]",
-                  colour="cyan") as pbar:
-
-            for zip_path, root, filename in zip_files:
-                date_match = (
-                        re.search(r'(\d{8}_\d{6})', filename) or
-                        re.search(r'(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})',
-                                  filename) or
-                        re.search(r'(\d{4}-\d{2}-\d{2})', filename) or
-                        re.search(r'(\d{8})', filename)
-                )
-
-                if date_match:
-                    date_formatted = date_match.group(1)
-
-                    try:
-                        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                            file_list = zip_ref.namelist()
-                            is_video = any(
-                                f.lower().endswith(('.mp4', '.mov')) for f in
-                                file_list)
-                            if is_video:
-                                videos_count += 1
-                            else:
-                                images_count += 1
-
-                        if self.process_single_zip(zip_path, root,
-                                                   date_formatted):
-                            processed_count += 1
-                            os.remove(zip_path)
-                            pbar.set_postfix_str(
-                                f"✓ {processed_count} | ✗ {failed_count} | 🖼️  {images_count} | 🎬 {videos_count}")
-                        else:
-                            failed_count += 1
-                            pbar.set_postfix_str(
-                                f"✓ {processed_count} | ✗ {failed_count} | 🖼️  {images_count} | 🎬 {videos_count}")
-                    except Exception:
-                        failed_count += 1
-                        pbar.set_postfix_str(
-                            f"✓ {processed_count} | ✗ {failed_count} | 🖼️  {images_count} | 🎬 {videos_count}")
-                else:
-                    failed_count += 1
-                    pbar.set_postfix_str(
-                        f"✓ {processed_count} | ✗ {failed_count} | 🖼️  {images_count} | 🎬 {videos_count}")
-
-                pbar.update(1)
-
         print_color("\n" + "=" * 80, Colors.BLUE)
         print_color("📊 ZIP PROCESSING SUMMARY", Colors.BOLD)
         print_color("=" * 80, Colors.BLUE)
-        print_color(f"✓ Successfully processed: {processed_count}/{total}",
+        print_color(f"✓ Successfully processed: {self.processed_count}/{self.submitted_count}",
                     Colors.GREEN)
-        if failed_count > 0:
-            print_color(f"✗ Failed: {failed_count}", Colors.RED)
-        print_color(f"🖼️  Images: {images_count}", Colors.CYAN)
-        print_color(f"🎬 Videos: {videos_count}", Colors.CYAN)
+        if self.failed_count > 0:
+            print_color(f"✗ Failed: {self.failed_count}", Colors.RED)
+        print_color(f"🖼️  Images: {self.images_count}", Colors.CYAN)
+        print_color(f"🎬 Videos: {self.videos_count}", Colors.CYAN)
+        if self.start_time is not None:
+            print_color(f"⏱️  Elapsed time: {time.time() - self.start_time:.2f} seconds", Colors.CYAN)
+        if self._video_composer is not None:
+            for line in self._video_composer.summary_lines():
+                print_color(line, Colors.CYAN)
         print_color("=" * 80 + "\n", Colors.BLUE)
@@ -0,0 +1,102 @@
+import json
+
+from src.manifest import Manifest
+from src.output_index import OutputIndex
+
+LINK = "https://app.snapchat.com/dmd/memories?uid=u&sid=s&mid=abc&ts=1&sig=first"
+NEWER_LINK = "https://app.snapchat.com/dmd/memories?uid=u&sid=s&mid=abc&ts=2&sig=second"
+
+
+def write_lines(tmp_path, *entries):
+    # Strings are written as they are, e.g. a line torn by a crash
+    lines = (entry if isinstance(entry, str) else json.dumps(entry) for entry in entries)
+    (tmp_path / Manifest.FILENAME).write_text(''.join(line + "\n" for line in lines))
+
+
+def reopen(manifest):
+    manifest.close()
+    return Manifest(manifest.output_dir)
+
+
+def test_newer_export_finds_the_memory(tmp_path):
+    manifest = Manifest(str(tmp_path))
+    manifest.record(LINK, 'success', path=str(tmp_path / 'a.jpg'), size=3)
+
+    assert manifest.get(NEWER_LINK)['path'] == 'a.jpg'
+    assert reopen(manifest).get(NEWER_LINK)['id'] == 'abc'
+
+
+def test_link_keyed_lines_are_keyed_by_media_id(tmp_path):
+    write_lines(tmp_path, {'id': LINK, 'status': 'success', 'path': 'a.jpg'})
+    manifest = Manifest(str(tmp_path))
+
+    assert list(manifest.entries) == ['abc']
+    assert manifest.get(NEWER_LINK)['path'] == 'a.jpg'
+    assert manifest.failed_ids() == set()
+
+
+def test_later_lines_win(tmp_path):
+    write_lines(tmp_path,
+                {'id': LINK, 'status': 'success', 'path': 'a.zip', 'checksum': 'c'},
+                '{"id": "abc", "status": "fai',
+                {'id': NEWER_LINK, 'status': 'success', 'path': 'a_original.jpg', 'checksum': 'c'})
+    manifest = Manifest(str(tmp_path))
+
+    assert manifest.get(LINK)['path'] == 'a_original.jpg'
+    assert not manifest.owns_path(str(tmp_path / 'a.zip'))
+    assert manifest.owns_path(str(tmp_path / 'a_original.jpg'))
+    assert manifest.path_for_checksum('c') == str(tmp_path / 'a_original.jpg')
+
+
+def test_failed_attempt_keeps_the_partial_download(tmp_path):
+    manifest = Manifest(str(tmp_path))
+    manifest.record(LINK, 'partial', partial={'path': '.a.part', 'size': 10, 'validator': None})
+    manifest.record(LINK, 'failed', error="timeout")
+
+    assert reopen(manifest).get(LINK)['partial']['size'] == 10
+    assert Manifest(str(tmp_path)).failed_ids() == {'abc'}
+
+
+def test_completed_path(tmp_path):
+    manifest = Manifest(str(tmp_path))
+    assert manifest.completed_path(LINK) is None
+
+    (tmp_path / 'a.jpg').write_bytes(b'abc')
+    manifest.record(LINK, 'success', path=str(tmp_path / 'a.jpg'), size=3)
+    assert manifest.completed_path(LINK) == str(tmp_path / 'a.jpg')
+
+    # A file of another size is not the one recorded, unless it was processed (e.g. a ZIP's media)
+    (tmp_path / 'a.jpg').write_bytes(b'abcd')
+    assert manifest.completed_path(LINK) is None
+    manifest.update(LINK, processed=True)
+    assert manifest.completed_path(LINK) == str(tmp_path / 'a.jpg')
+
+    (tmp_path / 'a.jpg').write_bytes(b'')
+    assert manifest.completed_path(LINK) is None
+
+    manifest.record(LINK, 'failed', error="timeout")
+    assert manifest.completed_path(LINK) is None
+
+
+def test_completed_path_with_index(tmp_path):
+    manifest = Manifest(str(tmp_path))
+    manifest.record(LINK, 'success', path=str(tmp_path / 'a.jpg'), size=3)
+    assert manifest.completed_path(LINK, OutputIndex(str(tmp_path))) is None
+
+    (tmp_path / 'a.jpg').write_bytes(b'abc')
+    assert manifest.completed_path(LINK, OutputIndex(str(tmp_path))) == str(tmp_path / 'a.jpg')
+
+
+def test_replace_path(tmp_path):
+    (tmp_path / 'a_original.jpg').write_bytes(b'media')
+    manifest = Manifest(str(tmp_path))
+    manifest.record(LINK, 'success', path=str(tmp_path / 'a.zip'), size=100, checksum='c')
+
+    manifest.replace_path(str(tmp_path / 'a.zip'), str(tmp_path / 'a_original.jpg'))
+    entry = reopen(manifest).get(LINK)
+    assert (entry['path'], entry['size'], entry['checksum'], entry['processed']) == ('a_original.jpg', 5, 'c', True)
+
+    # Paths no entry owns are left alone
+    manifest = Manifest(str(tmp_path))
+    manifest.replace_path(str(tmp_path / 'b.zip'), str(tmp_path / 'a_original.jpg'))
+    assert len(manifest.entries) == 1
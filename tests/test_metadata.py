@@ -0,0 +1,133 @@
+import io
+import os
+import shutil
+import subprocess
+
+import pytest
+from PIL import Image, ExifTags
+
+from src.models import Memory
+from src.metadata import MetadataWriter, jpeg_with_exif, gps_coordinate, DATETIME, DATETIME_ORIGINAL, OFFSET_TIME_ORIGINAL, \
+    GPS_LATITUDE_REF, GPS_LATITUDE, GPS_LONGITUDE_REF, GPS_LONGITUDE
+
+MAKE = 0x010F
+# 2024-05-01 10:00:00 UTC
+TIMESTAMP = 1714557600
+
+
+def jpeg(**options):
+    buffer = io.BytesIO()
+    image = Image.new('RGB', (48, 32))
+    image.putdata([(x * 5, y * 7, (x + y) * 3) for y in range(32) for x in range(48)])
+    image.save(buffer, 'JPEG', quality=90, **options)
+    return buffer.getvalue()
+
+
+def segments(data):
+    """(marker, bytes) of each segment before the scan, then (0xDA, scan data to the end)"""
+    result, offset = [], 2
+    while data[offset + 1] != 0xDA:
+        end = offset + 2 + int.from_bytes(data[offset + 2:offset + 4], 'big')
+        result.append((data[offset + 1], data[offset:end]))
+        offset = end
+    result.append((0xDA, data[offset:]))
+    return result
+
+
+def read_exif(data):
+    exif = Image.open(io.BytesIO(data)).getexif()
+    return exif, exif.get_ifd(ExifTags.IFD.Exif), exif.get_ifd(ExifTags.IFD.GPSInfo)
+
+
+def decimal(dms):
+    degrees, minutes, seconds = (float(value) for value in dms)
+    return degrees + minutes / 60 + seconds / 3600
+
+
+def test_scan_data_and_other_segments_are_untouched():
+    data = jpeg()
+    result = jpeg_with_exif(data, TIMESTAMP, 48.8566, 2.3522)
+
+    before, after = segments(data), segments(result)
+    assert [segment for segment in after if segment[0] != 0xE1] == before
+    # JFIF files must keep APP0 first
+    assert after[0][0] == 0xE0 and after[1][0] == 0xE1
+    assert Image.open(io.BytesIO(result)).tobytes() == Image.open(io.BytesIO(data)).tobytes()
+
+
+def test_capture_time_and_position_read_back():
+    exif, exif_ifd, gps = read_exif(jpeg_with_exif(jpeg(), TIMESTAMP, 48.8566, 2.3522))
+
+    assert exif[DATETIME] == "2024:05:01 10:00:00"
+    assert exif_ifd[DATETIME_ORIGINAL] == "2024:05:01 10:00:00"
+    assert exif_ifd[OFFSET_TIME_ORIGINAL] == "+00:00"
+    assert (gps[GPS_LATITUDE_REF], gps[GPS_LONGITUDE_REF]) == ('N', 'E')
+    assert decimal(gps[GPS_LATITUDE]) == pytest.approx(48.8566, abs=1e-5)
+    assert decimal(gps[GPS_LONGITUDE]) == pytest.approx(2.3522, abs=1e-5)
+
+
+def test_southern_and_western_positions():
+    _, _, gps = read_exif(jpeg_with_exif(jpeg(), None, -33.8688, -70.6693))
+    assert (gps[GPS_LATITUDE_REF], gps[GPS_LONGITUDE_REF]) == ('S', 'W')
+    assert decimal(gps[GPS_LATITUDE]) == pytest.approx(33.8688, abs=1e-5)
+    assert decimal(gps[GPS_LONGITUDE]) == pytest.approx(70.6693, abs=1e-5)
+
+
+def test_existing_exif_is_replaced_keeping_its_tags():
+    existing = Image.Exif()
+    existing[MAKE] = "Snap"
+    data = jpeg(exif=existing.tobytes())
+
+    result = jpeg_with_exif(data, TIMESTAMP, None, None)
+    exif, _, gps = read_exif(result)
+
+    assert [marker for marker, _ in segments(result)].count(0xE1) == 1
+    assert exif[MAKE] == "Snap"
+    assert exif[DATETIME] == "2024:05:01 10:00:00"
+    assert not gps
+    assert segments(result)[-1] == segments(data)[-1]
+
+
+def test_writing_twice_is_stable():
+    once = jpeg_with_exif(jpeg(), TIMESTAMP, 48.8566, 2.3522)
+    assert jpeg_with_exif(once, TIMESTAMP, 48.8566, 2.3522) == once
+
+
+def test_not_a_jpeg():
+    with pytest.raises(ValueError):
+        jpeg_with_exif(b'\x89PNG\r\n\x1a\n', TIMESTAMP, None, None)
+
+
+def test_gps_coordinate():
+    degrees, minutes, seconds = gps_coordinate(-48.8566)
+    assert (degrees, minutes) == (48.0, 51.0)
+    assert seconds == pytest.approx(23.76, abs=1e-3)
+
+
+def test_hardlinked_duplicates_get_the_metadata(tmp_path):
+    path, duplicate = tmp_path / 'photo.jpg', tmp_path / 'photo_1.jpg'
+    path.write_bytes(jpeg())
+    os.link(path, duplicate)
+
+    memory = Memory('https://example.com/?mid=1', '2024-05-01 10:00:00 UTC', 'Image', 48.8566, 2.3522, TIMESTAMP)
+    MetadataWriter(str(tmp_path), manifest=None).write_jpeg(str(path), memory)
+
+    assert path.stat().st_nlink == 2 and path.stat().st_ino == duplicate.stat().st_ino
+    exif, _, _ = read_exif(duplicate.read_bytes())
+    assert exif[DATETIME] == "2024:05:01 10:00:00"
+    assert not list(tmp_path.glob('.*'))
+
+
+@pytest.mark.skipif(not shutil.which('ffmpeg'), reason="ffmpeg is not installed")
+def test_hardlinked_video_gets_the_metadata(tmp_path):
+    path, duplicate = tmp_path / 'clip.mp4', tmp_path / 'clip_1.mp4'
+    subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'color=c=red:s=64x48:d=1:r=25',
+                    '-c:v', 'libx264', '-pix_fmt', 'yuv420p', str(path)], check=True)
+    os.link(path, duplicate)
+
+    memory = Memory('https://example.com/?mid=1', '2024-05-01 10:00:00 UTC', 'Video', 48.8566, 2.3522, TIMESTAMP)
+    MetadataWriter(str(tmp_path), manifest=None).write_video(str(path), memory)
+
+    assert path.stat().st_nlink == 2 and path.stat().st_ino == duplicate.stat().st_ino
+    probe = subprocess.run(['ffmpeg', '-i', str(duplicate)], capture_output=True, text=True).stderr
+    assert "creation_time   : 2024-05-01T10:00:00" in probe
@@ -0,0 +1,69 @@
+import threading
+
+from src.output_index import OutputIndex
+
+
+def index_with(tmp_path, *names):
+    for name in names:
+        (tmp_path / name).write_bytes(b'')
+    return OutputIndex(str(tmp_path))
+
+
+def test_stem_in_use_moves_to_the_next_suffix(tmp_path):
+    index = index_with(tmp_path, '20240501_100000_original.jpg', '20240501_100000_1.mp4')
+    assert index.allocate_stem(str(tmp_path), '20240501_100000') == '20240501_100000_2'
+    assert index.allocate_stem(str(tmp_path), '20240501_100001') == '20240501_100001'
+
+
+def test_kept_zip_does_not_take_its_own_stem(tmp_path):
+    index = index_with(tmp_path)
+    assert index.allocate(str(tmp_path), '20240501_100000', 'zip') == '20240501_100000.zip'
+    assert index.allocate_stem(str(tmp_path), '20240501_100000') == '20240501_100000'
+
+
+def test_reserved_stems_are_not_handed_out_again(tmp_path):
+    index = index_with(tmp_path)
+    assert index.allocate_stem(str(tmp_path), '20240501') == '20240501'
+    assert index.allocate_stem(str(tmp_path), '20240501') == '20240501_1'
+    # Nor used by single files
+    assert index.allocate(str(tmp_path), '20240501', 'jpg') == '20240501_2.jpg'
+
+
+def test_removed_files_free_their_stem(tmp_path):
+    index = index_with(tmp_path, '20240501_100000.jpg')
+    index.remove(str(tmp_path / '20240501_100000.jpg'))
+    assert index.allocate_stem(str(tmp_path), '20240501_100000') == '20240501_100000'
+
+
+def test_added_files_take_their_stem(tmp_path):
+    index = index_with(tmp_path)
+    index.add(str(tmp_path / '20240501_100000_composed.jpg'))
+    index.add(str(tmp_path / '20240501_100000_composed.jpg'))
+    assert index.allocate_stem(str(tmp_path), '20240501_100000') == '20240501_100000_1'
+    index.remove(str(tmp_path / '20240501_100000_composed.jpg'))
+    assert index.allocate_stem(str(tmp_path), '20240501_100000') == '20240501_100000'
+
+
+def test_concurrent_allocations_never_share_a_name(tmp_path):
+    index = index_with(tmp_path)
+    results = []
+    barrier = threading.Barrier(16)
+
+    def worker():
+        barrier.wait()
+        for _ in range(25):
+            results.append(index.allocate(str(tmp_path), '20240501_100000', 'jpg'))
+            results.append(index.allocate_stem(str(tmp_path), '20240501_100000'))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    names = [name for name in results if name.endswith('.jpg')]
+    stems = [name for name in results if not name.endswith('.jpg')]
+    assert len(set(names)) == len(names) == 400
+    assert len(set(stems)) == len(stems) == 400
+    # No stem is the name of a file, so a ZIP's outputs never land on one
+    assert not {name[:-len('.jpg')] for name in names} & set(stems)
@@ -0,0 +1,42 @@
+import pytest
+
+from src.models import Memory
+from src.scheduler import Scheduler, link_time
+
+
+def memory(mid, date, ts=None, kind='Image'):
+    url = f"https://app.snapchat.com/dmd/memories?mid={mid}" + (f"&ts={ts}" if ts is not None else "")
+    return Memory(url, f"{date} 10:00:00 UTC", kind).prepare()
+
+
+def mids(memories):
+    return [link.url.split('mid=')[1].split('&')[0] for link in memories]
+
+
+def test_link_time_reads_seconds_and_milliseconds():
+    assert link_time(memory('a', '2024-05-01', 1714557600).url) == 1714557600
+    assert link_time(memory('a', '2024-05-01', 1714557600000).url) == 1714557600
+    assert link_time(memory('a', '2024-05-01').url) is None
+
+
+def test_expiring_starts_with_the_oldest_links():
+    memories = [memory('new', '2024-05-01', 300), memory('none', '2024-05-02'), memory('old', '2024-05-03', 100)]
+    assert mids(Scheduler('expiring').order(memories)) == ['old', 'new', 'none']
+
+
+@pytest.mark.parametrize('strategy, expected', [
+    ('html', ['b', 'd', 'a', 'c']),
+    ('newest', ['d', 'c', 'b', 'a']),
+    ('images-first', ['b', 'a', 'c', 'd']),
+])
+def test_expiry_breaks_ties(strategy, expected):
+    # a and b, then c and d share a date; b and d were signed first, and d is a video
+    memories = [memory('a', '2024-05-01', 200), memory('b', '2024-05-01', 100),
+                memory('c', '2024-05-02', 200), memory('d', '2024-05-02', 100, 'Video')]
+    assert mids(Scheduler(strategy).order(memories)) == expected
+
+
+def test_links_signed_together_keep_the_export_order():
+    memories = [memory(mid, '2024-05-01', 100) for mid in 'cab']
+    assert mids(Scheduler('html').order(memories)) == ['c', 'a', 'b']
+    assert mids(Scheduler('html').order([memory(mid, '2024-05-01') for mid in 'cab'])) == ['c', 'a', 'b']
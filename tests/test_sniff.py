@@ -0,0 +1,149 @@
+import io
+import shutil
+import struct
+import zipfile
+import subprocess
+
+import pytest
+from PIL import Image
+
+from src.sniff import sniff, SNIFF_SIZE
+
+
+def image_bytes(format, size=(37, 21), mode='RGB', **options):
+    buffer = io.BytesIO()
+    Image.new(mode, size, 'red').save(buffer, format, **options)
+    return buffer.getvalue()
+
+
+def box(kind, payload=b''):
+    return struct.pack('>I', 8 + len(payload)) + kind + payload
+
+
+def mvhd(timescale, duration, version=0):
+    if version == 1:
+        payload = b'\x01\x00\x00\x00' + bytes(16) + struct.pack('>IQ', timescale, duration)
+    else:
+        payload = bytes(4) + bytes(8) + struct.pack('>II', timescale, duration)
+    return box(b'mvhd', payload.ljust(100 if version == 0 else 112, b'\x00'))
+
+
+def tkhd(width, height, version=0):
+    # Everything up to the 16.16 fixed-point size: flags, times, track ID, duration, layer, volume, matrix
+    head = b'\x01\x00\x00\x07' + bytes(84) if version == 1 else b'\x00\x00\x00\x07' + bytes(72)
+    return box(b'tkhd', head + struct.pack('>II', width << 16, height << 16))
+
+
+def moov(version=0, timescale=1000, duration=2500, tracks=((0, 0), (640, 360))):
+    traks = b''.join(box(b'trak', tkhd(width, height, version)) for width, height in tracks)
+    return box(b'moov', mvhd(timescale, duration, version) + traks)
+
+
+def mp4(brand=b'isom', **moov_options):
+    return box(b'ftyp', brand + bytes(4) + brand) + moov(**moov_options) + box(b'mdat', bytes(64))
+
+
+def zip_bytes(entries):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('options', [{}, {'progressive': True}, {'exif': Image.Exif().tobytes()}])
+def test_jpeg(options):
+    info = sniff(image_bytes('JPEG', **options))
+    assert (info.kind, info.extension, info.mime) == ('image', 'jpg', 'image/jpeg')
+    assert (info.width, info.height) == (37, 21)
+
+
+def test_png():
+    info = sniff(image_bytes('PNG', mode='RGBA'))
+    assert (info.kind, info.extension, info.width, info.height) == ('image', 'png', 37, 21)
+
+
+def test_gif():
+    info = sniff(image_bytes('GIF'))
+    assert (info.kind, info.extension, info.width, info.height) == ('image', 'gif', 37, 21)
+
+
+@pytest.mark.parametrize('chunk, options', [
+    (b'VP8 ', {}),
+    (b'VP8L', {'lossless': True}),
+    (b'VP8X', {'exif': Image.Exif().tobytes()}),
+])
+def test_webp(chunk, options):
+    data = image_bytes('WEBP', **options)
+    assert data[12:16] == chunk
+    info = sniff(data)
+    assert (info.kind, info.extension, info.width, info.height) == ('image', 'webp', 37, 21)
+
+
+@pytest.mark.parametrize('version', [0, 1])
+def test_mp4_duration_and_video_track_size(version):
+    info = sniff(mp4(version=version))
+    assert (info.kind, info.extension, info.mime) == ('video', 'mp4', 'video/mp4')
+    # The audio track (0x0) comes first and is skipped
+    assert (info.width, info.height) == (640, 360)
+    assert info.duration == 2.5
+
+
+def test_quicktime_keeps_mp4_extension():
+    info = sniff(mp4(brand=b'qt  ', timescale=600, duration=900, tracks=((1080, 1920),)))
+    assert (info.kind, info.extension, info.mime) == ('video', 'mp4', 'video/quicktime')
+    assert (info.width, info.height, info.duration) == (1080, 1920, 1.5)
+
+
+def test_heic():
+    ispe = box(b'ispe', bytes(4) + struct.pack('>II', 4032, 3024))
+    data = box(b'ftyp', b'heic' + bytes(4) + b'mif1heic') + box(b'meta', bytes(4) + ispe)
+    info = sniff(data)
+    assert (info.kind, info.extension, info.width, info.height) == ('image', 'heic', 4032, 3024)
+
+
+def test_moov_beyond_head_leaves_size_unknown():
+    # Without faststart the moov box follows the media data, past the sniffed bytes
+    data = box(b'ftyp', b'isom' + bytes(4)) + box(b'mdat', bytes(SNIFF_SIZE)) + moov()
+    info = sniff(data[:SNIFF_SIZE])
+    assert (info.kind, info.width, info.height, info.duration) == ('video', None, None, None)
+
+
+@pytest.mark.skipif(not shutil.which('ffmpeg'), reason="ffmpeg is not installed")
+def test_ffmpeg_mp4(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    subprocess.run(['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'color=c=red:s=64x48:d=1:r=25',
+                    '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-movflags', '+faststart', str(path)], check=True)
+    info = sniff(path.read_bytes()[:SNIFF_SIZE])
+    assert (info.kind, info.width, info.height) == ('video', 64, 48)
+    assert info.duration == pytest.approx(1.0, abs=0.05)
+
+
+@pytest.mark.parametrize('entries, contains', [
+    ([('media.mp4', b'video'), ('overlay.png', b'png')], 'video'),
+    ([('overlay.png', b'png'), ('media.jpg', b'jpeg')], 'image'),
+    ([('notes.txt', b'text')], None),
+])
+def test_zip_contents(entries, contains):
+    info = sniff(zip_bytes(entries))
+    assert (info.kind, info.extension, info.mime) == ('zip', 'zip', 'application/zip')
+    assert info.contains == contains
+
+
+def test_content_type_fallback():
+    assert (sniff(b'', 'video/mp4; codecs=avc1').kind, sniff(b'', 'video/mp4').extension) == ('video', 'mp4')
+    unknown = sniff(b'\x00' * 16, 'application/octet-stream')
+    assert (unknown.kind, unknown.extension) == ('unknown', 'dat')
+
+
+@pytest.mark.parametrize('data', [
+    image_bytes('JPEG')[:12], image_bytes('PNG')[:16], image_bytes('WEBP')[:20], mp4()[:60], zip_bytes([('a', b'')])[:20],
+])
+def test_truncated_heads_do_not_raise(data):
+    info = sniff(data)
+    assert info.width is None and info.height is None
+
+
+def test_to_dict_drops_unknown_fields():
+    assert sniff(image_bytes('PNG')).to_dict() == {
+        'kind': 'image', 'extension': 'png', 'mime': 'image/png', 'width': 37, 'height': 21}